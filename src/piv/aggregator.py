@@ -0,0 +1,252 @@
+import os
+import numpy as np
+import pandas as pd
+
+class Aggregator:
+    """
+    Materializa agregados semanales, mensuales y anuales de OHLCV y KPIs para
+    que el dashboard no tenga que recorrer filas diarias en rangos amplios.
+    """
+
+    # Resolución -> (frecuencia del período, días calendario por período)
+    RESOLUCIONES = {
+        'semanal': ('W-FRI', 7),
+        'mensual': ('M', 30.44),
+        'anual': ('Y', 365.25),
+    }
+
+    # Cómo se resume cada columna diaria dentro de un período
+    REGLAS = {
+        'apertura': 'first',
+        'alto': 'max',
+        'bajo': 'min',
+        'cerrar': 'last',
+        'cierre_ajustado': 'last',
+        'volumen': 'sum',
+        'retorno_diario': 'mean',
+        'tasa_variacion_ac': 'mean',
+        'retorno_acumulado': 'last',
+        'media_movil_5d': 'mean',
+        'volatilidad': 'mean',
+    }
+
+    def __init__(self, logger, puntos_minimos=60):
+        self.logger = logger
+        self.puntos_minimos = puntos_minimos
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        self.data_path = os.path.join(base_dir, "static", "data")
+
+    @staticmethod
+    def columna_conteo(columna):
+        """Columna del agregado con las filas diarias no nulas de `columna`"""
+        return f"n_{columna}"
+
+    def ruta(self, resolucion):
+        return os.path.join(self.data_path, f"meta_agregado_{resolucion}.csv")
+
+    # Filas iniciales de cada ventana diaria que el enricher rellena con 0
+    ARRANQUE = {'retorno_diario': 1, 'media_movil_5d': 4, 'volatilidad': 4}
+
+    def _sin_arranque(self, df):
+        """
+        El histórico diario se re-enriquece desde cero en cada corrida: los
+        ceros de arranque de los KPIs móviles se dejan fuera de las medias.
+        """
+        posicion = df.groupby('ticker').cumcount() if 'ticker' in df.columns else pd.Series(range(len(df)), index=df.index)
+        for col, filas in self.ARRANQUE.items():
+            if col in df.columns:
+                df[col] = df[col].mask(posicion < filas)
+        return df
+
+    def _encadenar_retorno(self, df_agg):
+        """
+        Recalcula retorno_acumulado con la base del primer período del agregado:
+        los períodos conservados y los recalculados vienen de ventanas diarias
+        con distinto inicio. Base = cierre del primer período / (1 + su retorno).
+        """
+        if not {'cerrar', 'retorno_acumulado'} <= set(df_agg.columns) or df_agg.empty:
+            return df_agg
+        grupos = df_agg.groupby('ticker', sort=False) if 'ticker' in df_agg.columns else [(None, df_agg)]
+        for _, grupo in grupos:
+            primero = grupo.index[0]
+            base = df_agg.at[primero, 'cerrar'] / (1 + df_agg.at[primero, 'retorno_acumulado'])
+            df_agg.loc[grupo.index, 'retorno_acumulado'] = df_agg.loc[grupo.index, 'cerrar'] / base - 1
+        return df_agg
+
+    def agregar(self, df, resolucion, arranque=True):
+        """
+        Agrega filas diarias (una o varias acciones) a la resolución indicada.
+        Con `arranque` se descartan los ceros iniciales de los KPIs móviles.
+        """
+        frecuencia, _ = self.RESOLUCIONES[resolucion]
+        df = df.copy()
+        df['fecha'] = pd.to_datetime(df['fecha'], errors='coerce')
+        df = df.dropna(subset=['fecha']).sort_values('fecha')
+        if arranque:
+            df = self._sin_arranque(df)
+        df['periodo'] = df['fecha'].dt.to_period(frecuencia).astype(str)
+
+        claves = ['ticker', 'periodo'] if 'ticker' in df.columns else ['periodo']
+        reglas = {col: regla for col, regla in self.REGLAS.items() if col in df.columns}
+        reglas['fecha'] = 'last'
+
+        grupos = df.groupby(claves, sort=False)
+        df_agg = grupos.agg(reglas)
+        df_agg['fecha_inicio'] = grupos['fecha'].first()
+        df_agg['dias'] = grupos.size()
+        # Filas que entran en cada media: sin los nulos ni el arranque enmascarado
+        for col in reglas:
+            if self.REGLAS.get(col) in ('mean', 'sum'):
+                df_agg[self.columna_conteo(col)] = grupos[col].count()
+        return df_agg.reset_index()
+
+    def actualizar(self, df_agregado, df_diario, resolucion):
+        """
+        Actualiza un agregado existente recalculando solo los períodos desde el
+        primero que recibe barras nuevas; los períodos cerrados se conservan.
+        """
+        conteos = [self.columna_conteo(col) for col, regla in self.REGLAS.items()
+                   if regla in ('mean', 'sum') and col in df_diario.columns]
+        if df_agregado is None or df_agregado.empty or not set(conteos) <= set(df_agregado.columns):
+            # Sin agregado previo o guardado sin conteos por columna: se recalcula completo
+            return self._encadenar_retorno(self.agregar(df_diario, resolucion))
+
+        frecuencia, _ = self.RESOLUCIONES[resolucion]
+        df_diario = df_diario.copy()
+        df_diario['fecha'] = pd.to_datetime(df_diario['fecha'], errors='coerce')
+        df_agregado = df_agregado.copy()
+        df_agregado['fecha'] = pd.to_datetime(df_agregado['fecha'])
+        df_agregado['fecha_inicio'] = pd.to_datetime(df_agregado['fecha_inicio'])
+
+        if 'ticker' in df_diario.columns:
+            grupos_diarios = df_diario.groupby('ticker', sort=False)
+        else:
+            grupos_diarios = [(None, df_diario)]
+
+        partes = []
+        tickers_nuevos = set()
+        for ticker, diario in grupos_diarios:
+            previo = df_agregado if ticker is None else df_agregado[df_agregado['ticker'] == ticker]
+            tickers_nuevos.add(ticker)
+
+            nuevas = diario[diario['fecha'] > previo['fecha'].max()] if not previo.empty else diario
+            if nuevas.empty:
+                partes.append(previo)
+                continue
+
+            corte = nuevas['fecha'].min().to_period(frecuencia)
+            periodos_previos = pd.PeriodIndex(previo['periodo'], freq=frecuencia)
+            diario_periodos = diario['fecha'].dt.to_period(frecuencia)
+
+            partes.append(previo[periodos_previos < corte])
+            # El arranque se marca sobre la ventana completa, antes de recortar
+            diario = self._sin_arranque(diario.sort_values('fecha'))
+            partes.append(self.agregar(diario[diario_periodos >= corte], resolucion, arranque=False))
+
+        if 'ticker' in df_agregado.columns:
+            partes.append(df_agregado[~df_agregado['ticker'].isin(tickers_nuevos)])
+
+        claves = ['ticker', 'fecha'] if 'ticker' in df_agregado.columns else ['fecha']
+        df_agg = pd.concat(partes, ignore_index=True).sort_values(claves).reset_index(drop=True)
+        return self._encadenar_retorno(df_agg)
+
+    def actualizar_archivos(self, df_diario):
+        """Actualiza y guarda los CSV agregados de todas las resoluciones"""
+        try:
+            for resolucion in self.RESOLUCIONES:
+                ruta = self.ruta(resolucion)
+                previo = pd.read_csv(ruta) if os.path.exists(ruta) else None
+                df_agg = self.actualizar(previo, df_diario, resolucion)
+                self.verificar_media_rango(df_agg, df_diario, resolucion)
+
+                df_guardar = df_agg.copy()
+                df_guardar['fecha'] = df_guardar['fecha'].dt.strftime('%m/%d/%Y')
+                df_guardar['fecha_inicio'] = df_guardar['fecha_inicio'].dt.strftime('%m/%d/%Y')
+                df_guardar.to_csv(ruta, index=False, float_format='%.4f')
+
+                self.logger.info("Aggregator", "actualizar_archivos", f"Agregado {resolucion} guardado: {df_agg.shape}")
+            return True
+
+        except Exception as e:
+            self.logger.error("Aggregator", "actualizar_archivos", f"Error al actualizar agregados: {e}")
+            return False
+
+    def elegir_resolucion(self, fecha_inicio, fecha_fin):
+        """
+        Devuelve la resolución más gruesa que aún deja al menos
+        `puntos_minimos` períodos en el rango; 'diario' si ninguna alcanza.
+        """
+        dias = (pd.to_datetime(fecha_fin) - pd.to_datetime(fecha_inicio)).days + 1
+        for resolucion in reversed(list(self.RESOLUCIONES)):
+            _, dias_periodo = self.RESOLUCIONES[resolucion]
+            if dias / dias_periodo >= self.puntos_minimos:
+                return resolucion
+        return 'diario'
+
+    def filtrar(self, df_agregado, fecha_inicio, fecha_fin):
+        """Períodos del agregado que se solapan con el rango"""
+        return df_agregado[(df_agregado['fecha'] >= pd.to_datetime(fecha_inicio)) &
+                           (df_agregado['fecha_inicio'] <= pd.to_datetime(fecha_fin))]
+
+    def media_rango(self, df_agregado, df_diario, columna, fecha_inicio, fecha_fin):
+        """
+        Media diaria de una columna en el rango: los períodos completamente
+        contenidos salen del agregado (media * filas no nulas) y solo los bordes
+        se leen de las filas diarias, con el mismo arranque enmascarado que el
+        agregado. Para 'volumen' el agregado guarda la suma.
+        """
+        fecha_inicio = pd.to_datetime(fecha_inicio)
+        fecha_fin = pd.to_datetime(fecha_fin)
+
+        df_diario = df_diario.copy()
+        df_diario['fecha'] = pd.to_datetime(df_diario['fecha'], errors='coerce')
+        df_diario = self._sin_arranque(df_diario.dropna(subset=['fecha']).sort_values('fecha'))
+
+        completos = pd.DataFrame()
+        if not df_agregado.empty:
+            completos = df_agregado[(df_agregado['fecha_inicio'] >= fecha_inicio) &
+                                    (df_agregado['fecha'] <= fecha_fin)]
+        if completos.empty:
+            borde = df_diario[(df_diario['fecha'] >= fecha_inicio) & (df_diario['fecha'] <= fecha_fin)]
+            return borde[columna].mean()
+
+        # Las filas diarias fuera de los períodos completos son los bordes
+        borde = df_diario[((df_diario['fecha'] >= fecha_inicio) & (df_diario['fecha'] < completos['fecha_inicio'].min())) |
+                          ((df_diario['fecha'] > completos['fecha'].max()) & (df_diario['fecha'] <= fecha_fin))]
+
+        conteo = completos[self.columna_conteo(columna)]
+        if self.REGLAS.get(columna) == 'sum':
+            total = completos[columna].sum()
+        else:
+            total = (completos[columna] * conteo).sum()
+
+        n = conteo.sum() + borde[columna].count()
+        return (total + borde[columna].sum()) / n if n else float('nan')
+
+    def verificar_media_rango(self, df_agregado, df_diario, resolucion, rangos=20, semilla=0):
+        """
+        Compara media_rango con la media de las filas diarias enmascaradas en
+        rangos al azar; registra un error por cada columna que no coincide.
+        """
+        if 'ticker' in df_agregado.columns or df_agregado.empty:
+            return True
+        diario = df_diario.copy()
+        diario['fecha'] = pd.to_datetime(diario['fecha'], errors='coerce')
+        diario = self._sin_arranque(diario.dropna(subset=['fecha']).sort_values('fecha'))
+
+        rng = np.random.default_rng(semilla)
+        fechas = diario['fecha'].to_numpy()
+        columnas = [col for col, regla in self.REGLAS.items() if regla in ('mean', 'sum') and col in diario.columns]
+        correcto = True
+        for _ in range(rangos):
+            inicio, fin = np.sort(rng.choice(fechas, 2))
+            en_rango = diario[(diario['fecha'] >= inicio) & (diario['fecha'] <= fin)]
+            for col in columnas:
+                esperado = en_rango[col].mean()
+                obtenido = self.media_rango(df_agregado, df_diario, col, inicio, fin)
+                if not np.isclose(obtenido, esperado, rtol=1e-6, equal_nan=True):
+                    correcto = False
+                    self.logger.error("Aggregator", "verificar_media_rango",
+                                      f"{resolucion} {col} [{pd.Timestamp(inicio).date()}, {pd.Timestamp(fin).date()}]: "
+                                      f"{obtenido} != {esperado}")
+        return correcto
@@ -0,0 +1,125 @@
+import os
+import json
+import time
+import shutil
+import numpy as np
+import pandas as pd
+
+class ArrayCache:
+    """
+    Publica DataFrames como un archivo .npy por columna más un manifiesto JSON.
+    Los lectores mapean los arreglos en memoria de solo lectura, así todos los
+    procesos del dashboard comparten la misma copia en el page cache del sistema.
+    """
+
+    def __init__(self, logger, ruta=None, versiones_a_conservar=2):
+        self.logger = logger
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        self.ruta = ruta or os.path.join(base_dir, "static", "data", "cache")
+        self.versiones_a_conservar = versiones_a_conservar
+
+    def ruta_manifiesto(self, nombre):
+        return os.path.join(self.ruta, f"{nombre}.json")
+
+    def firma(self, nombre):
+        """(mtime, tamaño) del manifiesto; cambia en cada publicación"""
+        try:
+            stat = os.stat(self.ruta_manifiesto(nombre))
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+
+    def publicar(self, nombre, df):
+        """
+        Escribe las columnas en un directorio de versión nuevo y luego reemplaza
+        el manifiesto de forma atómica: los lectores ven la versión anterior o la
+        nueva completa, nunca una a medias.
+        """
+        try:
+            version = str(time.time_ns())
+            directorio = os.path.join(self.ruta, nombre, version)
+            os.makedirs(directorio, exist_ok=True)
+
+            columnas = []
+            for i, col in enumerate(df.columns):
+                serie = df[col]
+                archivo = f"{i:03d}.npy"
+                entrada = {'nombre': col, 'archivo': archivo}
+
+                if isinstance(serie.dtype, pd.CategoricalDtype) or serie.dtype == object:
+                    categorica = serie.astype('category')
+                    entrada['tipo'] = 'categoria'
+                    entrada['categorias'] = [str(c) for c in categorica.cat.categories]
+                    entrada['ordenada'] = bool(categorica.cat.ordered)
+                    valores = categorica.cat.codes.to_numpy()
+                elif pd.api.types.is_datetime64_any_dtype(serie):
+                    entrada['tipo'] = 'fecha'
+                    valores = serie.to_numpy(dtype='datetime64[ns]').view('int64')
+                elif isinstance(serie.dtype, pd.api.extensions.ExtensionDtype):
+                    # Enteros con nulos: valores y máscara por separado
+                    entrada['tipo'] = 'nullable'
+                    entrada['dtype'] = str(serie.dtype)
+                    entrada['mascara'] = f"{i:03d}_mascara.npy"
+                    np.save(os.path.join(directorio, entrada['mascara']), serie.isna().to_numpy())
+                    valores = serie.fillna(0).to_numpy(dtype=serie.dtype.numpy_dtype)
+                else:
+                    entrada['tipo'] = 'numerico'
+                    valores = serie.to_numpy()
+
+                np.save(os.path.join(directorio, archivo), valores)
+                columnas.append(entrada)
+
+            manifiesto = {'nombre': nombre, 'version': version, 'filas': len(df), 'columnas': columnas}
+            ruta_manifiesto = self.ruta_manifiesto(nombre)
+            with open(ruta_manifiesto + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(manifiesto, f, ensure_ascii=False)
+            os.replace(ruta_manifiesto + ".tmp", ruta_manifiesto)
+
+            self._limpiar(nombre)
+            self.logger.info("ArrayCache", "publicar", f"{nombre} publicado: {df.shape}, versión {version}")
+            return True
+
+        except Exception as e:
+            self.logger.error("ArrayCache", "publicar", f"Error al publicar {nombre}: {e}")
+            return False
+
+    def _limpiar(self, nombre):
+        """Borra versiones viejas; los procesos que aún las mapean conservan sus páginas"""
+        versiones = sorted(os.listdir(os.path.join(self.ruta, nombre)), key=int, reverse=True)
+        for version in versiones[self.versiones_a_conservar:]:
+            shutil.rmtree(os.path.join(self.ruta, nombre, version), ignore_errors=True)
+
+    def cargar(self, nombre):
+        """DataFrame cuyas columnas apuntan directamente a los archivos mapeados"""
+        try:
+            ruta_manifiesto = self.ruta_manifiesto(nombre)
+            if not os.path.exists(ruta_manifiesto):
+                return pd.DataFrame()
+
+            with open(ruta_manifiesto, encoding="utf-8") as f:
+                manifiesto = json.load(f)
+            directorio = os.path.join(self.ruta, nombre, manifiesto['version'])
+
+            series = {}
+            for entrada in manifiesto['columnas']:
+                valores = np.load(os.path.join(directorio, entrada['archivo']), mmap_mode='r')
+
+                if entrada['tipo'] == 'categoria':
+                    tipo = pd.CategoricalDtype(entrada['categorias'], ordered=entrada['ordenada'])
+                    datos = pd.Categorical.from_codes(valores, dtype=tipo)
+                elif entrada['tipo'] == 'fecha':
+                    datos = valores.view('datetime64[ns]')
+                elif entrada['tipo'] == 'nullable':
+                    mascara = np.load(os.path.join(directorio, entrada['mascara']), mmap_mode='r')
+                    clase = pd.api.types.pandas_dtype(entrada['dtype']).construct_array_type()
+                    datos = clase(valores, mascara)
+                else:
+                    datos = valores
+
+                series[entrada['nombre']] = pd.Series(datos, copy=False)
+
+            return pd.DataFrame(series, copy=False)
+
+        except Exception as e:
+            self.logger.error("ArrayCache", "cargar", f"Error al cargar {nombre}: {e}")
+            return pd.DataFrame()
@@ -0,0 +1,125 @@
+import os
+import glob
+import argparse
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from logger import Logger
+from collector import Collector
+
+class Backfill:
+    """
+    Descarga historias de varios años partiendo el rango en bloques por ticker.
+    Los bloques se descargan en paralelo (con un máximo de `workers`) y cada
+    bloque terminado queda guardado, así una ejecución interrumpida continúa
+    donde quedó.
+    """
+
+    def __init__(self, logger, workers=4, dias_bloque=90, reintentos=2, ruta=None):
+        self.logger = logger
+        self.workers = workers
+        self.dias_bloque = dias_bloque
+        self.reintentos = reintentos
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        self.ruta = ruta or os.path.join(base_dir, "static", "data", "backfill")
+
+    def dividir_rango(self, fecha_inicio, fecha_fin):
+        """Bloques [inicio, fin] de `dias_bloque` días; siempre los mismos para el mismo rango"""
+        fecha_inicio = pd.Timestamp(fecha_inicio).normalize()
+        fecha_fin = pd.Timestamp(fecha_fin).normalize()
+        bloques = []
+        inicio = fecha_inicio
+        while inicio <= fecha_fin:
+            fin = min(inicio + pd.Timedelta(days=self.dias_bloque - 1), fecha_fin)
+            bloques.append((inicio, fin))
+            inicio = fin + pd.Timedelta(days=1)
+        return bloques
+
+    def ruta_bloque(self, ticker, inicio, fin):
+        return os.path.join(self.ruta, ticker, f"{inicio:%Y%m%d}_{fin:%Y%m%d}.csv")
+
+    def descargar_bloque(self, ticker, inicio, fin):
+        """Descarga un bloque, lo recorta a su rango y lo guarda como checkpoint"""
+        collector = Collector(self.logger, ticker)
+        ultimo_error = None
+        for _ in range(self.reintentos + 1):
+            try:
+                df = collector.descargar(inicio, fin + pd.Timedelta(days=1))
+                break
+            except Exception as e:
+                ultimo_error = e
+        else:
+            raise ultimo_error
+
+        if 'fecha' in df.columns:
+            df = df.dropna(subset=['fecha'])
+            df = df[(df['fecha'] >= inicio) & (df['fecha'] <= fin)]
+
+        # Se escribe a un temporal y se renombra: un bloque a medio escribir
+        # nunca cuenta como terminado
+        ruta = self.ruta_bloque(ticker, inicio, fin)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        df.to_csv(ruta + ".tmp", index=False)
+        os.replace(ruta + ".tmp", ruta)
+        return len(df)
+
+    def combinar(self, ticker):
+        """Une los bloques de un ticker sin filas duplicadas y guarda la historia"""
+        archivos = sorted(glob.glob(os.path.join(self.ruta, ticker, "*.csv")))
+        partes = [pd.read_csv(archivo) for archivo in archivos]
+        partes = [parte for parte in partes if not parte.empty]
+        if not partes:
+            return pd.DataFrame()
+
+        df = pd.concat(partes, ignore_index=True)
+        df['fecha'] = pd.to_datetime(df['fecha'], errors='coerce')
+        df = df.dropna(subset=['fecha'])
+        df = df.drop_duplicates(subset=['fecha'], keep='last').sort_values('fecha', ascending=False)
+
+        df_guardar = df.copy()
+        df_guardar['fecha'] = df_guardar['fecha'].dt.strftime('%m/%d/%Y')
+        ruta = os.path.join(self.ruta, f"{ticker.lower()}_history.csv")
+        df_guardar.to_csv(ruta, index=False, float_format='%.2f')
+        self.logger.info("Backfill", "combinar", f"Historia de {ticker} guardada: {df.shape}")
+        return df
+
+    def ejecutar(self, tickers, fecha_inicio, fecha_fin):
+        """Descarga los bloques pendientes de todos los tickers y combina cada historia"""
+        pendientes = [
+            (ticker, inicio, fin)
+            for ticker in tickers
+            for inicio, fin in self.dividir_rango(fecha_inicio, fecha_fin)
+            if not os.path.exists(self.ruta_bloque(ticker, inicio, fin))
+        ]
+        self.logger.info("Backfill", "ejecutar", f"{len(pendientes)} bloque(s) pendiente(s) para {len(tickers)} ticker(s)")
+
+        fallidos = []
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futuros = {executor.submit(self.descargar_bloque, *bloque): bloque for bloque in pendientes}
+            for futuro in as_completed(futuros):
+                ticker, inicio, fin = futuros[futuro]
+                try:
+                    filas = futuro.result()
+                    self.logger.info("Backfill", "ejecutar", f"{ticker} {inicio:%Y-%m-%d}..{fin:%Y-%m-%d}: {filas} filas")
+                except Exception as e:
+                    fallidos.append(futuros[futuro])
+                    self.logger.error("Backfill", "ejecutar", f"{ticker} {inicio:%Y-%m-%d}..{fin:%Y-%m-%d}: {e}")
+
+        historias = {ticker: self.combinar(ticker) for ticker in tickers}
+        return historias, fallidos
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill histórico por bloques y en paralelo")
+    parser.add_argument("--tickers", nargs="+", default=["META"])
+    parser.add_argument("--desde", required=True, help="Fecha inicial (YYYY-MM-DD)")
+    parser.add_argument("--hasta", default=pd.Timestamp.today().strftime('%Y-%m-%d'), help="Fecha final (YYYY-MM-DD)")
+    parser.add_argument("--workers", type=int, default=4, help="Descargas simultáneas")
+    parser.add_argument("--dias-bloque", type=int, default=90, help="Días por bloque")
+    args = parser.parse_args()
+
+    backfill = Backfill(Logger(), workers=args.workers, dias_bloque=args.dias_bloque)
+    historias, fallidos = backfill.ejecutar(args.tickers, args.desde, args.hasta)
+
+    for ticker, df in historias.items():
+        print(f"{ticker}: {len(df)} filas")
+    if fallidos:
+        print(f"{len(fallidos)} bloque(s) fallaron; vuelve a ejecutar el comando para reintentarlos")
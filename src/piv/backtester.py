@@ -0,0 +1,191 @@
+import os
+import glob
+import time
+import argparse
+import itertools
+import numpy as np
+import pandas as pd
+from logger import Logger
+
+class Backtester:
+    """
+    Evalúa reglas de señal sobre muchos tickers y una grilla de parámetros
+    como arreglos (parámetros x tickers x tiempo). Las medias y volatilidades
+    móviles de cualquier ventana salen de una sola suma acumulada de precios,
+    retornos y retornos al cuadrado, sin un rolling de pandas por ticker.
+
+    Regla: posición larga cuando la media rápida supera a la lenta y, si hay
+    filtro, la volatilidad anualizada de `ventana_vol` días está bajo
+    `umbral_vol`. La señal del día t se opera con el retorno de t + 1.
+    """
+
+    def __init__(self, logger, costo=0.0, dias_anio=252, bloque=64, dtype=np.float32):
+        self.logger = logger
+        self.costo = costo
+        self.dias_anio = dias_anio
+        self.bloque = bloque
+        # float32 alcanza para retornos diarios y reduce a la mitad memoria y tiempo
+        self.dtype = dtype
+
+    def matriz(self, frames, columna='cerrar'):
+        """
+        Precios (tickers x fechas) desde {ticker: df enriquecido} o un frame
+        largo con columna 'ticker'. Los huecos repiten el último precio.
+        """
+        if isinstance(frames, dict):
+            frames = pd.concat([df.assign(ticker=t) for t, df in frames.items()], ignore_index=True)
+        df = frames.dropna(subset=['fecha', columna])
+        tabla = df.pivot_table(index='ticker', columns='fecha', values=columna, aggfunc='last')
+        tabla = tabla.sort_index(axis=1).ffill(axis=1).bfill(axis=1)
+        return list(tabla.index), tabla.columns, tabla.to_numpy(dtype=float)
+
+    @staticmethod
+    def _acumulada(X):
+        return np.concatenate([np.zeros((len(X), 1)), np.cumsum(X, axis=1)], axis=1)
+
+    @staticmethod
+    def _ventana(C, w):
+        """Suma móvil de `w` días desde la acumulada C; NaN hasta completar la ventana"""
+        suma = np.full((C.shape[0], C.shape[1] - 1), np.nan)
+        suma[:, w - 1:] = C[:, w:] - C[:, :-w]
+        return suma
+
+    def indicadores(self, precios, rapidas, lentas, ventanas_vol):
+        """Medias móviles y volatilidades anualizadas por ventana, desde las acumuladas"""
+        retornos = np.zeros_like(precios)
+        retornos[:, 1:] = precios[:, 1:] / precios[:, :-1] - 1
+
+        c_precio = self._acumulada(precios)
+        c_ret, c_ret2 = self._acumulada(retornos), self._acumulada(retornos ** 2)
+
+        medias = {w: self._ventana(c_precio, w) / w for w in set(rapidas) | set(lentas)}
+        volatilidades = {}
+        for w in ventanas_vol:
+            if w:
+                media = self._ventana(c_ret, w) / w
+                varianza = np.maximum(self._ventana(c_ret2, w) / w - media ** 2, 0) * w / max(w - 1, 1)
+                volatilidades[w] = np.sqrt(varianza * self.dias_anio)
+        return retornos, medias, volatilidades
+
+    def grilla(self, rapidas, lentas, ventanas_vol=(0,), umbrales_vol=(np.inf,)):
+        """Combinaciones válidas (rapida < lenta); ventana_vol 0 = sin filtro"""
+        combinaciones = []
+        for r, l, w, u in itertools.product(rapidas, lentas, ventanas_vol, umbrales_vol):
+            if r >= l or (w == 0) != np.isinf(u):
+                continue
+            combinaciones.append({'rapida': r, 'lenta': l, 'ventana_vol': w, 'umbral_vol': u})
+        return pd.DataFrame(combinaciones)
+
+    def _metricas(self, posiciones, retornos):
+        """Métricas (bloque x tickers) de las señales booleanas (bloque x tickers x tiempo)"""
+        # Señal de t aplicada al retorno de t + 1
+        pos = np.zeros_like(posiciones)
+        pos[..., 1:] = posiciones[..., :-1]
+        cambios = pos[..., 1:] != pos[..., :-1]
+
+        diarios = np.multiply(pos, retornos, dtype=self.dtype)
+        if self.costo:
+            diarios[..., 1:] -= np.multiply(cambios, self.costo, dtype=self.dtype)
+
+        dias = retornos.shape[-1]
+        media = diarios.sum(axis=-1, dtype=float) / dias
+        varianza = np.einsum('...t,...t->...', diarios, diarios, dtype=float) / dias - media ** 2
+        desvio = np.sqrt(np.maximum(varianza, 0))
+
+        # La curva de capital reutiliza el buffer de retornos diarios
+        equity = np.cumprod(np.add(diarios, 1, out=diarios), axis=-1, out=diarios)
+        drawdown = (equity / np.maximum.accumulate(equity, axis=-1)).min(axis=-1) - 1
+        final = equity[..., -1].astype(float)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sharpe = np.where(desvio > 0, media / desvio * np.sqrt(self.dias_anio), 0.0)
+        return {
+            'retorno_total': final - 1,
+            'retorno_anual': final ** (self.dias_anio / dias) - 1,
+            'volatilidad_anual': desvio * np.sqrt(self.dias_anio),
+            'sharpe': sharpe,
+            'max_drawdown': drawdown.astype(float),
+            'turnover_anual': np.count_nonzero(cambios, axis=-1) * self.dias_anio / dias,
+            'exposicion': pos.mean(axis=-1),
+        }
+
+    def ejecutar(self, frames, rapidas=(5, 10, 20), lentas=(20, 50, 100, 200),
+                 ventanas_vol=(0, 20), umbrales_vol=(np.inf, 0.3, 0.5), columna='cerrar'):
+        """
+        Devuelve un DataFrame con una fila por (parámetros, ticker) y las
+        métricas de la regla. Los parámetros se procesan en bloques para
+        acotar la memoria del arreglo (bloque x tickers x tiempo).
+        """
+        try:
+            inicio = time.perf_counter()
+            tickers, fechas, precios = self.matriz(frames, columna)
+            grilla = self.grilla(rapidas, lentas, ventanas_vol, umbrales_vol)
+            retornos, medias, volatilidades = self.indicadores(
+                precios, grilla['rapida'].unique(), grilla['lenta'].unique(), grilla['ventana_vol'].unique())
+
+            resultados = []
+            for desde in range(0, len(grilla), self.bloque):
+                parte = grilla.iloc[desde:desde + self.bloque]
+                posiciones = np.empty((len(parte),) + precios.shape, dtype=bool)
+                with np.errstate(invalid='ignore'):
+                    for i, (r, l, w, u) in enumerate(parte.itertuples(index=False)):
+                        np.greater(medias[r], medias[l], out=posiciones[i])
+                        if w:
+                            posiciones[i] &= volatilidades[w] < u
+
+                metricas = self._metricas(posiciones, retornos)
+                bloque = parte.loc[parte.index.repeat(len(tickers))].reset_index(drop=True)
+                bloque.insert(0, 'ticker', np.tile(tickers, len(parte)))
+                resultados.append(bloque.assign(**{k: v.ravel() for k, v in metricas.items()}))
+
+            df = pd.concat(resultados, ignore_index=True)
+            segundos = time.perf_counter() - inicio
+            self.logger.info("Backtester", "ejecutar",
+                             f"{len(grilla)} combinaciones x {len(tickers)} tickers x {len(fechas)} días "
+                             f"evaluadas en {segundos:.2f}s")
+            return df
+
+        except Exception as e:
+            self.logger.error("Backtester", "ejecutar", f"Error en backtesting: {e}")
+            return pd.DataFrame()
+
+    def resumen(self, resultados, metrica='sharpe'):
+        """Promedio de cada combinación sobre los tickers, ordenado por `metrica`"""
+        parametros = ['rapida', 'lenta', 'ventana_vol', 'umbral_vol']
+        return (resultados.drop(columns='ticker').groupby(parametros).mean()
+                .sort_values(metrica, ascending=False).reset_index())
+
+def leer_enriquecidos(ruta_pipeline, archivo):
+    """Frames enriquecidos del pipeline multi-ticker o, si no hay, el de META"""
+    frames = {}
+    for ruta in sorted(glob.glob(os.path.join(ruta_pipeline, "*", "enriquecido.csv"))):
+        frames[os.path.basename(os.path.dirname(ruta))] = pd.read_csv(ruta)
+    if not frames:
+        frames['META'] = pd.read_csv(archivo)
+    for df in frames.values():
+        df['fecha'] = pd.to_datetime(df['fecha'], errors='coerce')
+    return frames
+
+if __name__ == "__main__":
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    datos = os.path.join(base_dir, "static", "data")
+    parser = argparse.ArgumentParser(description="Backtesting vectorizado de cruces de medias y filtro de volatilidad")
+    parser.add_argument("--pipeline", default=os.path.join(datos, "pipeline"), help="Directorio del pipeline multi-ticker")
+    parser.add_argument("--archivo", default=os.path.join(datos, "meta_data_enricher.csv"))
+    parser.add_argument("--rapidas", type=int, nargs="+", default=[5, 10, 20])
+    parser.add_argument("--lentas", type=int, nargs="+", default=[20, 50, 100, 200])
+    parser.add_argument("--ventanas-vol", type=int, nargs="+", default=[0, 20], help="0 = sin filtro")
+    parser.add_argument("--umbrales-vol", type=float, nargs="+", default=[0.3, 0.5], help="Volatilidad anualizada máxima")
+    parser.add_argument("--costo", type=float, default=0.0005, help="Costo por unidad de rotación")
+    args = parser.parse_args()
+
+    backtester = Backtester(Logger(), costo=args.costo)
+    resultados = backtester.ejecutar(leer_enriquecidos(args.pipeline, args.archivo), args.rapidas, args.lentas,
+                                     args.ventanas_vol, [np.inf] + args.umbrales_vol)
+
+    salida = os.path.join(datos, "backtest")
+    os.makedirs(salida, exist_ok=True)
+    resultados.to_csv(os.path.join(salida, "resultados.csv"), index=False)
+
+    pd.set_option('display.width', 200)
+    print(backtester.resumen(resultados).head(10).to_string(index=False))
@@ -0,0 +1,78 @@
+import os
+import time
+import argparse
+import warnings
+import numpy as np
+import pandas as pd
+from statsmodels.tsa.arima.model import ARIMA
+from logger import Logger
+from modeller import BaselineModeller
+
+def universo(archivo, sinteticos, semilla=0):
+    """
+    Frame largo (ticker, fecha, cierre_ajustado): el histórico real más
+    `sinteticos` caminatas aleatorias con la volatilidad diaria del real.
+    """
+    df = pd.read_csv(archivo)
+    df['fecha'] = pd.to_datetime(df['fecha'])
+    df['cierre_ajustado'] = pd.to_numeric(df['cierre_ajustado'], errors='coerce')
+    df = df.dropna(subset=['cierre_ajustado']).drop_duplicates('fecha').sort_values('fecha')
+    frames = [df.assign(ticker='META')[['ticker', 'fecha', 'cierre_ajustado']]]
+
+    rng = np.random.default_rng(semilla)
+    retornos = np.log(df['cierre_ajustado']).diff().dropna()
+    for i in range(sinteticos):
+        pasos = rng.normal(retornos.mean(), retornos.std(), len(df))
+        frames.append(pd.DataFrame({
+            'ticker': f"SIM{i:03d}",
+            'fecha': df['fecha'].to_numpy(),
+            'cierre_ajustado': rng.uniform(20, 500) * np.exp(np.cumsum(pasos)),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+def errores(reales, pred):
+    mae = np.mean(np.abs(pred - reales))
+    mape = np.mean(np.abs((pred - reales) / reales)) * 100
+    return mae, mape
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de BaselineModeller contra ARIMA por ticker")
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    parser.add_argument("--archivo", default=os.path.join(base_dir, "static", "data", "meta_history.csv"))
+    parser.add_argument("--sinteticos", type=int, default=49, help="Tickers sintéticos además de META")
+    parser.add_argument("--horizonte", type=int, default=10, help="Días reservados para evaluar")
+    args = parser.parse_args()
+
+    baseline = BaselineModeller(Logger())
+    tickers, Y = baseline.matriz(universo(args.archivo, args.sinteticos))
+    h = args.horizonte
+    entrenamiento, reales = Y[:, :-h], Y[:, -h:]
+    print(f"Universo: {len(tickers)} tickers x {Y.shape[1]} días, horizonte {h}")
+
+    # Baselines: todo el universo en una pasada, con la misma selección que entrenar()
+    inicio = time.perf_counter()
+    parametros = baseline.ajustar(entrenamiento)
+    parametros['metodo'] = baseline.seleccionar(entrenamiento)
+    pred_baseline = baseline.pronosticar(parametros, h)
+    seg_baseline = time.perf_counter() - inicio
+
+    # ARIMA(1,1,1) como en Modeller.entrenar, un ajuste por ticker
+    inicio = time.perf_counter()
+    pred_arima = np.empty_like(reales)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for i, serie in enumerate(entrenamiento):
+            pred_arima[i] = ARIMA(serie, order=(1, 1, 1)).fit().forecast(steps=h)
+    seg_arima = time.perf_counter() - inicio
+
+    filas = []
+    for nombre, pred, seg in [('baseline', pred_baseline, seg_baseline), ('arima', pred_arima, seg_arima)]:
+        mae, mape = errores(reales, pred)
+        filas.append({'motor': nombre, 'segundos': round(seg, 3), 'ms_por_ticker': round(seg / len(tickers) * 1000, 2),
+                      'mae': round(mae, 3), 'mape': round(mape, 3)})
+    print(pd.DataFrame(filas).to_string(index=False))
+    print(f"Aceleración: {seg_arima / seg_baseline:.0f}x")
+    print("Métodos elegidos:", pd.Series(parametros['metodo']).value_counts().to_dict())
+
+if __name__ == "__main__":
+    main()
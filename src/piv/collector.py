@@ -6,74 +6,91 @@ import os
 import re
 
 class Collector:
-    def __init__(self, logger):
-        self.url = 'https://es.finance.yahoo.com/quote/META/history/'
+    def __init__(self, logger, ticker='META'):
+        self.ticker = ticker
+        self.url = f'https://es.finance.yahoo.com/quote/{ticker}/history/'
         self.logger = logger
         os.makedirs('src/piv/static/data', exist_ok=True)
 
+    def descargar(self, fecha_inicio=None, fecha_fin=None, timeout=30):
+        """
+        Descarga y parsea la tabla histórica, opcionalmente acotada a un rango
+        de fechas. A diferencia de collector_data lanza la excepción para que
+        quien llama pueda reintentar.
+        """
+        params = {}
+        if fecha_inicio is not None and fecha_fin is not None:
+            params['period1'] = int(pd.Timestamp(fecha_inicio).timestamp())
+            params['period2'] = int(pd.Timestamp(fecha_fin).timestamp())
+
+        headers = {'User-Agent': 'Mozilla/5.0'}
+        response = requests.get(self.url, headers=headers, params=params, timeout=timeout)
+
+        if response.status_code != 200:
+            raise ValueError(f"Error al consultar la URL: {response.status_code}")
+
+        return self.parsear(response.text)
+
+    def parsear(self, html):
+        """Convierte el HTML de la página de historial en un DataFrame tipado"""
+        soup = BeautifulSoup(html, 'html.parser')
+        table = soup.select_one('div[data-testid="history-table"] table')
+
+        if table is None:
+            raise ValueError("No se encontró la tabla con data-testid='history-table'")
+
+        headerss = [th.get_text(strip=True) for th in table.thead.find_all('th')]
+        rows = []
+        for tr in table.tbody.find_all('tr'):
+            columnas = [td.get_text(strip=True) for td in tr.find_all('td')]
+            if len(columnas) == len(headerss):
+                rows.append(columnas)
+
+        df = pd.DataFrame(rows, columns=headerss)
+
+        df.columns = df.columns.str.split('Precio de cierre ajustado').str[0]
+        df.columns = df.columns.str.replace(r'[^\w\s]', '', regex=True).str.strip().str.lower()
+
+        df.rename(columns={
+            'fecha': 'fecha',
+            'open': 'apertura',
+            'abrir': 'apertura',
+            'high': 'alto',
+            'máx': 'alto',
+            'low': 'bajo',
+            'mín': 'bajo',
+            'close': 'cerrar',
+            'adj close': 'cierre_ajustado',
+            'cierre ajustado': 'cierre_ajustado',
+            'volume': 'volumen',
+            'volumen': 'volumen'
+        }, inplace=True)
+
+        columnas_flotantes = ['apertura', 'alto', 'bajo', 'cerrar', 'cierre_ajustado']
+        for col in columnas_flotantes:
+            if col in df.columns:
+                df[col] = df[col].astype(str).apply(lambda x: re.sub(r'[^\d.,-]', '', x))
+                df[col] = df[col].str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+                df[col] = pd.to_numeric(df[col], errors='coerce')
+
+        if 'volumen' in df.columns:
+            df['volumen'] = df['volumen'].astype(str).apply(lambda x: re.sub(r'[^\d]', '', x))
+            df['volumen'] = pd.to_numeric(df['volumen'], errors='coerce', downcast='integer')
+
+        if 'fecha' in df.columns:
+            df['fecha'] = pd.to_datetime(df['fecha'], errors='coerce')
+
+        df = df.dropna(how='all')
+        return df
+
     def collector_data(self):
         df = pd.DataFrame()
 
         try:
-            headers = {'User-Agent': 'Mozilla/5.0'}
-            response = requests.get(self.url, headers=headers)
-
-            if response.status_code != 200:
-                self.logger.error("Collector", "collector_data", f"Error al consultar la URL: {response.status_code}")
-                return df
-
-            soup = BeautifulSoup(response.text, 'html.parser')
-            table = soup.select_one('div[data-testid="history-table"] table')
-
-            if table is None:
-                self.logger.error("Collector", "collector_data", "No se encontró la tabla con data-testid='history-table'")
-                return df
-
-            headerss = [th.get_text(strip=True) for th in table.thead.find_all('th')]
-            rows = []
-            for tr in table.tbody.find_all('tr'):
-                columnas = [td.get_text(strip=True) for td in tr.find_all('td')]
-                if len(columnas) == len(headerss):
-                    rows.append(columnas)
-
-            df = pd.DataFrame(rows, columns=headerss)
-
-            df.columns = df.columns.str.split('Precio de cierre ajustado').str[0]
-            df.columns = df.columns.str.replace(r'[^\w\s]', '', regex=True).str.strip().str.lower()
-
-            df.rename(columns={
-                'fecha': 'fecha',
-                'open': 'apertura',
-                'abrir': 'apertura',
-                'high': 'alto',
-                'máx': 'alto',
-                'low': 'bajo',
-                'mín': 'bajo',
-                'close': 'cerrar',
-                'adj close': 'cierre_ajustado',
-                'cierre ajustado': 'cierre_ajustado',
-                'volume': 'volumen',
-                'volumen': 'volumen'
-            }, inplace=True)
-
-            columnas_flotantes = ['apertura', 'alto', 'bajo', 'cerrar', 'cierre_ajustado']
-            for col in columnas_flotantes:
-                if col in df.columns:
-                    df[col] = df[col].astype(str).apply(lambda x: re.sub(r'[^\d.,-]', '', x))
-                    df[col] = df[col].str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-
-            if 'volumen' in df.columns:
-                df['volumen'] = df['volumen'].astype(str).apply(lambda x: re.sub(r'[^\d]', '', x))
-                df['volumen'] = pd.to_numeric(df['volumen'], errors='coerce', downcast='integer')
-
-            if 'fecha' in df.columns:
-                df['fecha'] = pd.to_datetime(df['fecha'], errors='coerce')
-
-            df = df.dropna(how='all')
+            df = self.descargar()
             self.logger.info("Collector", "collector_data", f"Datos obtenidos exitosamente {df.shape}")
             return df
 
         except Exception as error:
             self.logger.error("Collector", "collector_data", f"Error al obtener los datos: {error}")
-            return df
\ No newline at end of file
+            return df
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+
+class Correlator:
+    """
+    Correlación y covarianza de Pearson por pares sobre muchas series a la vez.
+    Todo se expresa como sumas acumuladas que se obtienen con productos de
+    matrices (sin bucles por par), de modo que una ventana móvil solo suma las
+    filas que entran y resta las que salen.
+    """
+
+    def __init__(self, logger=None, bloque=256):
+        self.logger = logger
+        self.bloque = bloque
+
+    def matriz_retornos(self, df, columna='cerrar'):
+        """
+        Construye la matriz alineada (fechas x tickers) de retornos a partir de
+        un frame largo con columnas 'ticker', 'fecha' y `columna`.
+        """
+        precios = df.pivot_table(index='fecha', columns='ticker', values=columna, aggfunc='last')
+        precios = precios.sort_index()
+        return precios.pct_change(fill_method=None).iloc[1:]
+
+    def _sumas(self, valores):
+        """
+        Sumas suficientes por par (i, j) usando solo las filas donde ambas series
+        tienen dato: n, Σx, Σx², Σxy. Se calculan por bloques de filas.
+        """
+        k = valores.shape[1]
+        n = np.zeros((k, k))
+        sx = np.zeros((k, k))
+        sxx = np.zeros((k, k))
+        sxy = np.zeros((k, k))
+
+        for inicio in range(0, len(valores), self.bloque):
+            bloque = valores[inicio:inicio + self.bloque]
+            mascara = (~np.isnan(bloque)).astype(float)
+            x = np.nan_to_num(bloque)
+            n += mascara.T @ mascara
+            sx += x.T @ mascara
+            sxx += (x * x).T @ mascara
+            sxy += x.T @ x
+
+        return {'n': n, 'sx': sx, 'sxx': sxx, 'sxy': sxy}
+
+    def _combinar(self, sumas, otras, signo=1):
+        return {clave: sumas[clave] + signo * otras[clave] for clave in sumas}
+
+    def _matrices(self, sumas):
+        """Covarianza (ddof=1) y correlación a partir de las sumas por par"""
+        n, sx, sxx, sxy = sumas['n'], sumas['sx'], sumas['sxx'], sumas['sxy']
+        sy, syy = sx.T, sxx.T
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cov_n = n * sxy - sx * sy
+            cov = cov_n / (n * (n - 1))
+            corr = cov_n / np.sqrt((n * sxx - sx ** 2) * (n * syy - sy ** 2))
+
+        cov[n < 2] = np.nan
+        corr[n < 2] = np.nan
+        return cov, np.clip(corr, -1, 1)
+
+    def _preparar(self, df, fecha_inicio=None, fecha_fin=None):
+        if fecha_inicio is not None:
+            df = df[df.index >= pd.to_datetime(fecha_inicio)]
+        if fecha_fin is not None:
+            df = df[df.index <= pd.to_datetime(fecha_fin)]
+        return df, df.to_numpy(dtype=float)
+
+    def correlacion(self, df, fecha_inicio=None, fecha_fin=None):
+        """Matriz de correlación de las columnas de df en el rango de fechas"""
+        df, valores = self._preparar(df, fecha_inicio, fecha_fin)
+        _, corr = self._matrices(self._sumas(valores))
+        return pd.DataFrame(corr, index=df.columns, columns=df.columns)
+
+    def covarianza(self, df, fecha_inicio=None, fecha_fin=None):
+        """Matriz de covarianza de las columnas de df en el rango de fechas"""
+        df, valores = self._preparar(df, fecha_inicio, fecha_fin)
+        cov, _ = self._matrices(self._sumas(valores))
+        return pd.DataFrame(cov, index=df.columns, columns=df.columns)
+
+    def correlacion_movil(self, df, ventana, paso=1, fecha_inicio=None, fecha_fin=None, covarianza=False):
+        """
+        Genera (fecha, matriz) para cada ventana de `ventana` filas que termina
+        cada `paso` filas dentro del rango. Las sumas se actualizan sumando el
+        bloque que entra y restando el que sale.
+        """
+        df, valores = self._preparar(df, fecha_inicio, fecha_fin)
+        if len(valores) < ventana:
+            return
+
+        sumas = self._sumas(valores[:ventana])
+        fin = ventana
+        while True:
+            cov, corr = self._matrices(sumas)
+            matriz = cov if covarianza else corr
+            yield df.index[fin - 1], pd.DataFrame(matriz, index=df.columns, columns=df.columns)
+
+            siguiente = fin + paso
+            if siguiente > len(valores):
+                break
+            sumas = self._combinar(sumas, self._sumas(valores[fin:siguiente]))
+            sumas = self._combinar(sumas, self._sumas(valores[fin - ventana:siguiente - ventana]), signo=-1)
+            fin = siguiente
@@ -1,8 +1,5 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import pickle
 import os
 import numpy as np
@@ -10,6 +7,15 @@ from pathlib import Path
 from datetime import datetime, timedelta
 from modeller import Modeller
 from logger import Logger
+from enricher import Enricher
+from downsampler import Downsampler
+from aggregator import Aggregator
+from correlator import Correlator
+from arraycache import ArrayCache
+from ledger import ForecastLedger
+from figures import (FigureCache, vista, KPIS, COLUMNAS_CORRELACION, ANCHO_POR_DEFECTO,
+                     figura_kpi, figura_precio_volumen, figura_histograma, figura_volatilidad,
+                     figura_correlacion, figura_precision, figura_modelo, figura_predicciones)
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 
 # =================== CONFIGURACIÓN DE LA PÁGINA ===================
@@ -85,34 +91,71 @@ DATA_PATH = BASE_DIR / "static" / "data" / "meta_data_enricher.csv"
 HISTORY_PATH = BASE_DIR / "static" / "data" / "meta_history.csv"
 PREDICTIONS_PATH = BASE_DIR / "static" / "data" / "meta_predicciones.csv"
 MODEL_PATH = BASE_DIR / "static" / "data" / "models" / "model.pkl"
+FORECAST_CACHE_PATH = BASE_DIR / "static" / "data" / "models" / "forecast_cache.csv"
 
 # =================== FUNCIONES DE CARGA DE DATOS ===================
-@st.cache_data
-def load_data():
-    """Carga los datos enriquecidos"""
+def firma_archivo(path):
+    """
+    Firma (mtime, tamaño) de un archivo. Se pasa como argumento a los loaders
+    cacheados para que la clave cambie cuando main.py reescribe el archivo y
+    solo se recalcule el loader afectado. Las versiones viejas se descartan
+    por max_entries.
+    """
+    try:
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+@st.cache_resource
+def get_logger():
+    """Logger compartido por todas las sesiones"""
+    return Logger()
+
+@st.cache_data(max_entries=2)
+def load_data(firma=None):
+    """Carga los datos enriquecidos con el esquema compacto"""
     try:
         df = pd.read_csv(DATA_PATH)
         df['fecha'] = pd.to_datetime(df['fecha'])
-        return df
+        return Enricher(get_logger()).compactar(df)
     except Exception as e:
         st.error(f"Error al cargar datos enriquecidos: {e}")
         return pd.DataFrame()
 
-@st.cache_data
-def load_predictions():
+@st.cache_resource(max_entries=4)
+def load_shared(nombre, firma=None):
+    """
+    Frame publicado por main.py como arreglos memory-mapped. Se usa
+    cache_resource (sin copia por sesión) y los arreglos son de solo lectura,
+    así todas las sesiones y procesos comparten las mismas páginas.
+    """
+    return ArrayCache(get_logger()).cargar(nombre)
+
+def load_frame(nombre, path, loader):
+    """Usa el cache de arreglos mapeados si existe; si no, el CSV"""
+    firma = ArrayCache(get_logger()).firma(nombre)
+    if firma is not None:
+        df_shared = load_shared(nombre, firma)
+        if not df_shared.empty:
+            return df_shared
+    return loader(firma_archivo(path))
+
+@st.cache_data(max_entries=2)
+def load_predictions(firma=None):
     """Carga las predicciones si existen"""
     try:
         if PREDICTIONS_PATH.exists():
             df_pred = pd.read_csv(PREDICTIONS_PATH)
             df_pred['fecha'] = pd.to_datetime(df_pred['fecha'])
-            return df_pred
+            return Enricher(get_logger()).compactar(df_pred)
         return pd.DataFrame()
     except Exception as e:
         st.error(f"Error al cargar predicciones: {e}")
         return pd.DataFrame()
 
-@st.cache_data
-def load_model_metrics():
+@st.cache_data(max_entries=2)
+def load_model_metrics(firma_modelo=None, firma_datos=None):
     """Calcula las métricas del modelo si existe"""
     try:
         if not MODEL_PATH.exists():
@@ -121,7 +164,7 @@ def load_model_metrics():
         with open(MODEL_PATH, "rb") as f:
             model = pickle.load(f)
         
-        df = load_data()
+        df = load_data(firma_datos)
         if df.empty:
             return None
             
@@ -151,6 +194,57 @@ def load_model_metrics():
         st.error(f"Error al cargar métricas del modelo: {e}")
         return None
 
+@st.cache_data(max_entries=6)
+def load_aggregate(resolucion, firma=None):
+    """Carga el agregado semanal/mensual/anual generado por main.py"""
+    try:
+        ruta = Aggregator(get_logger()).ruta(resolucion)
+        if not os.path.exists(ruta):
+            return pd.DataFrame()
+        df_agg = pd.read_csv(ruta)
+        df_agg['fecha'] = pd.to_datetime(df_agg['fecha'])
+        df_agg['fecha_inicio'] = pd.to_datetime(df_agg['fecha_inicio'])
+        return df_agg
+    except Exception as e:
+        st.error(f"Error al cargar agregado {resolucion}: {e}")
+        return pd.DataFrame()
+
+@st.cache_resource
+def get_modeller():
+    """Modeller compartido por todas las sesiones"""
+    return Modeller(get_logger())
+
+@st.cache_data(max_entries=2)
+def load_model_version(firma=None):
+    """Versión (hash) del modelo; solo se recalcula cuando cambia model.pkl"""
+    return get_modeller().version_modelo()
+
+@st.cache_data(max_entries=64)
+def load_forecast(version, steps, firma_cache=None):
+    """
+    Pronóstico por (versión del modelo, pasos), compartido entre sesiones. Sale
+    del pronóstico precalculado por main.py y solo predice en vivo si falta.
+    """
+    return get_modeller().pronostico_cacheado(steps=steps, version=version)
+
+@st.cache_data(max_entries=2)
+def load_forecast_accuracy(firma=None):
+    """Métricas fuera de muestra por horizonte acumuladas por el ledger"""
+    return ForecastLedger(get_logger()).metricas()
+
+@st.cache_resource
+def get_figure_cache():
+    """Cache de figuras compartido por todas las sesiones"""
+    return FigureCache(get_logger())
+
+def mostrar_figura(version, fecha_desde, fecha_hasta, nombre_vista, construir):
+    """
+    Muestra la figura de la vista desde el cache; solo se construye si no está
+    en memoria ni pre-renderizada en disco por main.py
+    """
+    clave = FigureCache.clave(version, Modeller.TICKER_POR_DEFECTO, fecha_desde, fecha_hasta, nombre_vista)
+    st.plotly_chart(get_figure_cache().obtener(clave, construir), use_container_width=True)
+
 # =================== HEADER PRINCIPAL ===================
 st.markdown('<div class="main-header">📊 Meta Platforms Analytics Dashboard</div>', unsafe_allow_html=True)
 
@@ -159,9 +253,10 @@ st.sidebar.title("🔧 Configuraciones")
 st.sidebar.markdown("---")
 
 # Cargar datos
-df = load_data()
-df_predictions = load_predictions()
-model_metrics = load_model_metrics()
+firma_datos = firma_archivo(DATA_PATH)
+df = load_frame('enriquecido', DATA_PATH, load_data)
+df_predictions = load_frame('predicciones', PREDICTIONS_PATH, load_predictions)
+model_metrics = load_model_metrics(firma_archivo(MODEL_PATH), firma_datos)
 
 if df.empty:
     st.error("⚠️ No se pudieron cargar los datos. Ejecuta `main.py` primero.")
@@ -189,6 +284,35 @@ fecha_fin = st.sidebar.date_input(
 df_filtered = df[(df['fecha'] >= pd.to_datetime(fecha_inicio)) & 
                  (df['fecha'] <= pd.to_datetime(fecha_fin))]
 
+# Presupuesto de puntos por gráfico: ~2 puntos por píxel de ancho. Al acotar
+# el rango de fechas la serie vuelve a caber y se envía a resolución completa.
+st.sidebar.subheader("🖥️ Rendimiento")
+ancho_grafico = st.sidebar.select_slider(
+    "Ancho de gráfico (px)",
+    options=[600, 900, 1200, 1600, 2400],
+    value=ANCHO_POR_DEFECTO
+)
+downsampler = Downsampler(puntos_max=2 * ancho_grafico)
+
+# Resolución más gruesa que cabe en el rango: en rangos amplios los gráficos
+# y promedios salen del agregado precalculado en vez de las filas diarias
+aggregator = Aggregator(get_logger())
+resolucion = aggregator.elegir_resolucion(fecha_inicio, fecha_fin)
+df_agregado = pd.DataFrame()
+if resolucion != 'diario':
+    df_agregado = load_aggregate(resolucion, firma_archivo(aggregator.ruta(resolucion)))
+
+if df_agregado.empty:
+    resolucion = 'diario'
+    df_vista = df_filtered
+else:
+    df_vista = aggregator.filtrar(df_agregado, fecha_inicio, fecha_fin)
+st.sidebar.caption(f"Resolución de gráficos: {resolucion}")
+
+def promedio_rango(columna):
+    """Media diaria de la columna en el rango, usando el agregado si aplica"""
+    return aggregator.media_rango(df_agregado, df, columna, fecha_inicio, fecha_fin)
+
 # =================== MÉTRICAS PRINCIPALES ===================
 st.markdown('<div class="section-header">📈 Resumen Ejecutivo</div>', unsafe_allow_html=True)
 
@@ -212,7 +336,7 @@ if not df_filtered.empty:
         )
     
     with col3:
-        volatilidad_promedio = df_filtered['volatilidad'].mean()
+        volatilidad_promedio = promedio_rango('volatilidad')
         st.metric(
             "📉 Volatilidad Promedio",
             f"{volatilidad_promedio:.2f}",
@@ -220,7 +344,7 @@ if not df_filtered.empty:
         )
     
     with col4:
-        volumen_promedio = df_filtered['volumen'].mean()
+        volumen_promedio = promedio_rango('volumen')
         st.metric(
             "📊 Volumen Promedio",
             f"{volumen_promedio:,.0f}",
@@ -240,55 +364,16 @@ if not df_filtered.empty:
 # =================== GRÁFICOS DE INDICADORES FINANCIEROS ===================
 st.markdown('<div class="section-header">📊 Análisis de Indicadores Financieros</div>', unsafe_allow_html=True)
 
-# Configuración de indicadores
-kpi_options = {
-    'retorno_diario': 'Retorno Diario (%)',
-    'tasa_variacion_ac': 'Tasa de Variación Apertura-Cierre (%)',
-    'retorno_acumulado': 'Retorno Acumulado (%)',
-    'media_movil_5d': 'Media Móvil 5 Días ($)',
-    'volatilidad': 'Volatilidad (Rolling 5D)'
-}
-
 # Selector de KPI
 selected_kpi = st.selectbox(
     "🎯 Selecciona un indicador para análisis detallado:",
-    options=list(kpi_options.keys()),
-    format_func=lambda x: kpi_options[x]
-)
-
-# Crear gráfico interactivo
-fig = go.Figure()
-
-# Configurar formato según el tipo de indicador
-if selected_kpi in ['retorno_diario', 'tasa_variacion_ac', 'retorno_acumulado']:
-    y_values = df_filtered[selected_kpi] * 100  # Convertir a porcentaje
-    y_format = '.2%'
-    y_title = kpi_options[selected_kpi]
-else:
-    y_values = df_filtered[selected_kpi]
-    y_format = '.2f'
-    y_title = kpi_options[selected_kpi]
-
-fig.add_trace(go.Scatter(
-    x=df_filtered['fecha'],
-    y=y_values,
-    mode='lines',
-    name=kpi_options[selected_kpi],
-    line=dict(color='#1877f2', width=2),
-    hovertemplate='<b>Fecha:</b> %{x}<br><b>Valor:</b> %{y}<extra></extra>'
-))
-
-fig.update_layout(
-    title=f'📈 {kpi_options[selected_kpi]} - Evolución Temporal',
-    xaxis_title='Fecha',
-    yaxis_title=y_title,
-    template='plotly_white',
-    hovermode='x unified',
-    showlegend=False,
-    height=500
+    options=list(KPIS.keys()),
+    format_func=lambda x: KPIS[x]
 )
 
-st.plotly_chart(fig, use_container_width=True)
+mostrar_figura(firma_datos, fecha_inicio, fecha_fin,
+               vista('kpi', kpi=selected_kpi, ancho=ancho_grafico, resolucion=resolucion),
+               lambda: figura_kpi(df_vista, selected_kpi, downsampler))
 
 # =================== ANÁLISIS MULTIVARIADO ===================
 st.markdown('<div class="section-header">🔍 Análisis Multivariado</div>', unsafe_allow_html=True)
@@ -297,40 +382,9 @@ tab1, tab2, tab3 = st.tabs(["📊 Precios y Volumen", "📈 Indicadores Técnico
 
 with tab1:
     # Gráfico de precios con volumen
-    fig_multi = make_subplots(
-        rows=2, cols=1,
-        subplot_titles=('Precio de Cierre y Media Móvil', 'Volumen'),
-        vertical_spacing=0.1,
-        row_heights=[0.7, 0.3]
-    )
-    
-    # Precio de cierre
-    fig_multi.add_trace(
-        go.Scatter(x=df_filtered['fecha'], y=df_filtered['cerrar'],
-                  name='Precio de Cierre', line=dict(color='#1877f2')),
-        row=1, col=1
-    )
-    
-    # Media móvil
-    fig_multi.add_trace(
-        go.Scatter(x=df_filtered['fecha'], y=df_filtered['media_movil_5d'],
-                  name='Media Móvil 5D', line=dict(color='#ff6b6b', dash='dash')),
-        row=1, col=1
-    )
-    
-    # Volumen
-    fig_multi.add_trace(
-        go.Bar(x=df_filtered['fecha'], y=df_filtered['volumen'],
-               name='Volumen', marker_color='#95a5a6'),
-        row=2, col=1
-    )
-    
-    fig_multi.update_layout(height=600, template='plotly_white')
-    fig_multi.update_xaxes(title_text="Fecha", row=2, col=1)
-    fig_multi.update_yaxes(title_text="Precio ($)", row=1, col=1)
-    fig_multi.update_yaxes(title_text="Volumen", row=2, col=1)
-    
-    st.plotly_chart(fig_multi, use_container_width=True)
+    mostrar_figura(firma_datos, fecha_inicio, fecha_fin,
+                   vista('precio_volumen', ancho=ancho_grafico, resolucion=resolucion),
+                   lambda: figura_precio_volumen(df_vista, downsampler))
 
 with tab2:
     # Indicadores técnicos
@@ -338,30 +392,32 @@ with tab2:
     
     with col1:
         # Retorno diario
-        fig_ret = px.histogram(df_filtered, x='retorno_diario', nbins=30,
-                              title='Distribución del Retorno Diario')
-        fig_ret.update_layout(template='plotly_white')
-        st.plotly_chart(fig_ret, use_container_width=True)
+        mostrar_figura(firma_datos, fecha_inicio, fecha_fin, vista('histograma'),
+                       lambda: figura_histograma(df_filtered))
     
     with col2:
         # Volatilidad
-        fig_vol = px.line(df_filtered, x='fecha', y='volatilidad',
-                         title='Evolución de la Volatilidad')
-        fig_vol.update_layout(template='plotly_white')
-        st.plotly_chart(fig_vol, use_container_width=True)
+        mostrar_figura(firma_datos, fecha_inicio, fecha_fin,
+                       vista('volatilidad', ancho=ancho_grafico, resolucion=resolucion),
+                       lambda: figura_volatilidad(df_vista, downsampler))
 
 with tab3:
     # Matriz de correlación
-    numeric_cols = ['apertura', 'alto', 'bajo', 'cerrar', 'volumen', 
-                   'retorno_diario', 'volatilidad', 'media_movil_5d']
-    corr_matrix = df_filtered[numeric_cols].corr()
-    
-    fig_corr = px.imshow(corr_matrix, 
-                        title='Matriz de Correlación de Indicadores Financieros',
-                        color_continuous_scale='RdBu_r',
-                        aspect='auto')
-    fig_corr.update_layout(template='plotly_white', height=500)
-    st.plotly_chart(fig_corr, use_container_width=True)
+    ventana_corr = st.selectbox(
+        "Ventana de correlación:",
+        options=[0, 20, 60, 120],
+        format_func=lambda x: "Todo el rango" if x == 0 else f"Últimos {x} días"
+    )
+
+    def construir_correlacion():
+        # Ventana que termina en la fecha de fin seleccionada
+        df_corr = df_filtered.set_index('fecha')[COLUMNAS_CORRELACION]
+        if ventana_corr:
+            df_corr = df_corr.tail(ventana_corr)
+        return figura_correlacion(Correlator().correlacion(df_corr))
+
+    mostrar_figura(firma_datos, fecha_inicio, fecha_fin, vista('correlacion', ventana=ventana_corr),
+                   construir_correlacion)
 
 # =================== MODELO ARIMA Y PREDICCIONES ===================
 st.markdown('<div class="section-header">🤖 Modelo ARIMA y Predicciones</div>', unsafe_allow_html=True)
@@ -420,40 +476,21 @@ if model_metrics:
         </ul>
     </div>
     """, unsafe_allow_html=True)
+
+    # Precisión real de pronósticos pasados (fuera de muestra)
+    df_precision = load_forecast_accuracy(firma_archivo(ForecastLedger(get_logger()).ruta_metricas))
+    if not df_precision.empty:
+        st.markdown("#### 🎯 Precisión Fuera de Muestra por Horizonte")
+        mostrar_figura(firma_archivo(ForecastLedger(get_logger()).ruta_metricas), None, None, vista('precision'),
+                       lambda: figura_precision(df_precision))
+        st.caption(f"Basado en {int(df_precision['n'].sum())} pronósticos contrastados con precios reales. "
+                   f"MAPE promedio: {df_precision['mape'].mean():.2f}%")
     
     # Gráfico de ajuste del modelo
     st.markdown("#### 📈 Comparación: Valores Reales vs Modelo ARIMA")
     
-    fig_model = go.Figure()
-    
-    # Serie real
-    fig_model.add_trace(go.Scatter(
-        x=model_metrics['serie_real'].index,
-        y=model_metrics['serie_real'].values,
-        mode='lines',
-        name='Valores Reales',
-        line=dict(color='#1877f2', width=2)
-    ))
-    
-    # Predicciones del modelo
-    fig_model.add_trace(go.Scatter(
-        x=model_metrics['pred'].index,
-        y=model_metrics['pred'].values,
-        mode='lines',
-        name='ARIMA Ajustado',
-        line=dict(color='#ff6b6b', dash='dash', width=2)
-    ))
-    
-    fig_model.update_layout(
-        title='Serie de Tiempo: Comparación Modelo vs Realidad',
-        xaxis_title='Período',
-        yaxis_title='Precio de Cierre Ajustado ($)',
-        template='plotly_white',
-        hovermode='x unified',
-        height=500
-    )
-    
-    st.plotly_chart(fig_model, use_container_width=True)
+    mostrar_figura((firma_datos, firma_archivo(MODEL_PATH)), None, None, vista('modelo', ancho=ancho_grafico),
+                   lambda: figura_modelo(model_metrics['serie_real'], model_metrics['pred'], downsampler))
     
     # Predicción futura interactiva
     st.markdown("#### 🔮 Predicción Futura")
@@ -461,13 +498,12 @@ if model_metrics:
     col1, col2 = st.columns([1, 3])
     
     with col1:
-        steps = st.slider("Días a predecir:", min_value=1, max_value=30, value=7)
+        steps = st.slider("Días a predecir:", min_value=1, max_value=Modeller.HORIZONTE_MAXIMO, value=7)
         
         if st.button("🚀 Generar Predicción"):
             try:
-                logger = Logger()
-                modeller = Modeller(logger)
-                forecast = modeller.predecir(df, steps=steps)
+                version = load_model_version(firma_archivo(MODEL_PATH))
+                forecast = load_forecast(version, steps, firma_archivo(FORECAST_CACHE_PATH))
                 
                 st.success(f"✅ Predicción generada para {steps} días")
                 
@@ -490,36 +526,8 @@ if model_metrics:
         if not df_predictions.empty:
             st.markdown("##### 📊 Predicciones Precalculadas")
             
-            fig_pred = go.Figure()
-            
-            # Datos históricos (últimos 30 días)
-            df_recent = df.tail(30)
-            fig_pred.add_trace(go.Scatter(
-                x=df_recent['fecha'],
-                y=df_recent['cerrar'],
-                mode='lines',
-                name='Histórico',
-                line=dict(color='#1877f2', width=2)
-            ))
-            
-            # Predicciones
-            fig_pred.add_trace(go.Scatter(
-                x=df_predictions['fecha'],
-                y=df_predictions['cerrar'],
-                mode='lines',
-                name='Predicciones',
-                line=dict(color='#28a745', width=2, dash='dash')
-            ))
-            
-            fig_pred.update_layout(
-                title='Predicciones vs Datos Históricos',
-                xaxis_title='Fecha',
-                yaxis_title='Precio ($)',
-                template='plotly_white',
-                height=400
-            )
-            
-            st.plotly_chart(fig_pred, use_container_width=True)
+            mostrar_figura((firma_datos, firma_archivo(PREDICTIONS_PATH)), None, None, vista('predicciones'),
+                           lambda: figura_predicciones(df, df_predictions))
 
 else:
     st.markdown("""
@@ -541,7 +549,8 @@ st.markdown(f"""
     <small>
         📊 Dashboard generado el {datetime.now().strftime('%d/%m/%Y %H:%M:%S')} | 
         📈 Datos de {df['fecha'].min().strftime('%d/%m/%Y') if not df.empty else 'N/A'} a {df['fecha'].max().strftime('%d/%m/%Y') if not df.empty else 'N/A'} | 
-        🔄 Total de registros: {len(df)}
+        🔄 Total de registros: {len(df)} | 
+        💾 Memoria: {df.memory_usage(deep=True).sum() / 1e6:.2f} MB
     </small>
 </div>
 """, unsafe_allow_html=True)
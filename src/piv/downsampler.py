@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+
+class Downsampler:
+    def __init__(self, puntos_max=1000):
+        self.puntos_max = puntos_max
+
+    def _eje_x(self, x):
+        """Convierte fechas o índices a float para el cálculo de áreas"""
+        x = pd.Series(x)
+        if pd.api.types.is_datetime64_any_dtype(x):
+            return x.astype('int64').to_numpy(dtype=float)
+        return pd.to_numeric(x, errors='coerce').to_numpy(dtype=float)
+
+    def lttb(self, x, y, puntos=None):
+        """
+        Largest-Triangle-Three-Buckets: devuelve las posiciones de los puntos que
+        conservan la forma visual de la serie. Si la serie ya cabe en el
+        presupuesto se devuelven todas las posiciones.
+        """
+        puntos = puntos or self.puntos_max
+        y = np.asarray(y, dtype=float)
+        n = len(y)
+        if puntos >= n or puntos < 3:
+            return np.arange(n)
+
+        x = self._eje_x(x)
+        y = np.nan_to_num(y)
+        bordes = np.linspace(1, n - 1, puntos - 1).astype(int)
+        seleccion = np.empty(puntos, dtype=int)
+        seleccion[0] = 0
+        seleccion[-1] = n - 1
+        a = 0
+
+        for i in range(puntos - 2):
+            inicio, fin = bordes[i], bordes[i + 1]
+            sig_fin = bordes[i + 2] if i + 2 < len(bordes) else n
+            x_prom = x[fin:sig_fin].mean()
+            y_prom = y[fin:sig_fin].mean()
+
+            areas = np.abs(
+                (x[a] - x_prom) * (y[inicio:fin] - y[a])
+                - (x[a] - x[inicio:fin]) * (y_prom - y[a])
+            )
+            a = inicio + int(np.argmax(areas))
+            seleccion[i + 1] = a
+
+        return seleccion
+
+    def min_max(self, y, puntos=None):
+        """
+        Bucketing min/max: por cada bucket conserva el mínimo y el máximo, así
+        los picos de volumen no desaparecen al reducir la serie.
+        """
+        puntos = puntos or self.puntos_max
+        y = np.asarray(y, dtype=float)
+        n = len(y)
+        buckets = puntos // 2
+        if puntos >= n or buckets < 1:
+            return np.arange(n)
+
+        largo = n // buckets
+        y = np.nan_to_num(y)
+        cuerpo = y[:largo * buckets].reshape(buckets, largo)
+        base = np.arange(buckets) * largo
+        minimos = base + cuerpo.argmin(axis=1)
+        maximos = base + cuerpo.argmax(axis=1)
+
+        # Las filas sobrantes se suman al último bucket
+        if largo * buckets < n:
+            cola = y[(buckets - 1) * largo:]
+            minimos[-1] = (buckets - 1) * largo + cola.argmin()
+            maximos[-1] = (buckets - 1) * largo + cola.argmax()
+
+        return np.unique(np.concatenate([minimos, maximos]))
+
+    def reducir(self, df, x_col, y_col, metodo='lttb', puntos=None):
+        """Devuelve el subconjunto de filas de df que se enviará al gráfico"""
+        if df.empty:
+            return df
+        if metodo == 'min_max':
+            posiciones = self.min_max(df[y_col], puntos)
+        else:
+            posiciones = self.lttb(df[x_col], df[y_col], puntos)
+        return df.iloc[posiciones]
+
+    def reducir_serie(self, serie, puntos=None):
+        """Reduce una Serie usando su índice como eje x"""
+        if serie.empty:
+            return serie
+        return serie.iloc[self.lttb(serie.index, serie.values, puntos)]
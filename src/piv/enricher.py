@@ -1,7 +1,19 @@
 import numpy as np
 import pandas as pd
+from sklearn.metrics import r2_score
 
 class Enricher:
+    MESES = ['Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio', 'Julio',
+             'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre']
+
+    # Columnas que toleran float32 (~7 cifras significativas)
+    COLUMNAS_FLOAT32 = ['apertura', 'alto', 'bajo', 'cerrar', 'cierre_ajustado',
+                        'retorno_diario', 'tasa_variacion_ac', 'retorno_acumulado',
+                        'media_movil_5d', 'volatilidad', 'pred_arima']
+
+    # Enteros sin signo de numpy y su equivalente con nulos de pandas
+    ENTEROS_CON_NULOS = {'uint32': 'UInt32', 'uint64': 'UInt64'}
+
     def __init__(self, logger, modeller=None):
         self.logger = logger
         self.modeller = modeller
@@ -75,4 +87,60 @@ class Enricher:
 
         except Exception as e:
             self.logger.error("Enricher", "calcular_kpi", f"Error al enriquecer datos: {e}")
-            return pd.DataFrame()
\ No newline at end of file
+            return pd.DataFrame()
+
+    def compactar(self, df):
+        """
+        Esquema de memoria reducida: calendario como categorías/enteros
+        pequeños, precios y KPIs en float32, volumen en uint32 y ticker como
+        categoría. Si el volumen tiene nulos se usa el entero con nulos UInt32;
+        si tiene negativos o decimales se conserva su dtype.
+        """
+        df = df.copy()
+
+        for col in self.COLUMNAS_FLOAT32:
+            if col in df.columns:
+                df[col] = pd.to_numeric(df[col], errors='coerce').astype('float32')
+
+        if 'volumen' in df.columns:
+            volumen = pd.to_numeric(df['volumen'], errors='coerce')
+            validos = volumen.dropna()
+            if (validos < 0).any() or (validos % 1 != 0).any():
+                self.logger.warning("Enricher", "compactar", "Volumen negativo o no entero, se conserva su dtype")
+            else:
+                if validos.max() > np.iinfo('uint32').max:
+                    self.logger.warning("Enricher", "compactar", "Volumen fuera de rango uint32, se usa uint64")
+                    tipo = 'uint64'
+                else:
+                    tipo = 'uint32'
+                df['volumen'] = volumen.astype(self.ENTEROS_CON_NULOS[tipo] if volumen.isna().any() else tipo)
+
+        if 'dia' in df.columns:
+            df['dia'] = df['dia'].astype('int8')
+        if 'año' in df.columns:
+            df['año'] = df['año'].astype('int16')
+        if 'mes' in df.columns:
+            df['mes'] = pd.Categorical(df['mes'], categories=self.MESES, ordered=True)
+
+        for col in ['año_mes', 'ticker', 'tipo']:
+            if col in df.columns:
+                df[col] = df[col].astype('category')
+
+        return df
+
+    def reporte_memoria(self, df, df_compacto=None):
+        """Bytes por columna antes y después de compactar"""
+        df_compacto = self.compactar(df) if df_compacto is None else df_compacto
+        reporte = pd.DataFrame({
+            'dtype_original': df.dtypes.astype(str),
+            'bytes_original': df.memory_usage(deep=True, index=False),
+            'dtype_compacto': df_compacto.dtypes.astype(str),
+            'bytes_compacto': df_compacto.memory_usage(deep=True, index=False),
+        })
+        reporte.loc['TOTAL', ['bytes_original', 'bytes_compacto']] = reporte[['bytes_original', 'bytes_compacto']].sum()
+        reporte['ahorro'] = 1 - reporte['bytes_compacto'] / reporte['bytes_original']
+
+        total = reporte.loc['TOTAL']
+        self.logger.info("Enricher", "reporte_memoria",
+                         f"Memoria: {total['bytes_original'] / 1e6:.2f} MB -> {total['bytes_compacto'] / 1e6:.2f} MB ({total['ahorro']:.0%} menos)")
+        return reporte
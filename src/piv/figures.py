@@ -0,0 +1,331 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
+from plotly.subplots import make_subplots
+
+KPIS = {
+    'retorno_diario': 'Retorno Diario (%)',
+    'tasa_variacion_ac': 'Tasa de Variación Apertura-Cierre (%)',
+    'retorno_acumulado': 'Retorno Acumulado (%)',
+    'media_movil_5d': 'Media Móvil 5 Días ($)',
+    'volatilidad': 'Volatilidad (Rolling 5D)'
+}
+
+# Ancho de gráfico inicial del dashboard; las vistas por defecto se pre-renderizan con él
+ANCHO_POR_DEFECTO = 1200
+
+COLUMNAS_CORRELACION = ['apertura', 'alto', 'bajo', 'cerrar', 'volumen',
+                        'retorno_diario', 'volatilidad', 'media_movil_5d']
+
+def vista(nombre, **parametros):
+    """Identificador de la vista: su nombre y los parámetros que cambian la figura"""
+    return nombre + ''.join(f"|{k}={parametros[k]}" for k in sorted(parametros))
+
+class FigureCache:
+    """
+    Cache de figuras Plotly por (versión de datos, ticker, rango de fechas,
+    vista). En memoria guarda el objeto Figure ya construido (LRU acotado por
+    bytes); en disco, la especificación JSON que main.py pre-renderiza para las
+    vistas por defecto (también acotado por bytes, se descartan los archivos
+    menos usados). Un acierto evita reducir series y construir la figura.
+    """
+
+    def __init__(self, logger, ruta=None, max_bytes=128 * 2**20, max_bytes_disco=64 * 2**20):
+        self.logger = logger
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        self.ruta = ruta or os.path.join(base_dir, "static", "data", "figures")
+        self.max_bytes = max_bytes
+        self.max_bytes_disco = max_bytes_disco
+        self.memoria = OrderedDict()
+        self.bytes = 0
+        self.lock = threading.Lock()
+        self.aciertos_memoria = 0
+        self.aciertos_disco = 0
+        self.fallos = 0
+        os.makedirs(self.ruta, exist_ok=True)
+
+    @staticmethod
+    def firma(path):
+        """(mtime, tamaño) del archivo de datos: identifica su versión"""
+        try:
+            stat = os.stat(path)
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+
+    @staticmethod
+    def clave(version, ticker, fecha_inicio, fecha_fin, vista):
+        fechas = [pd.Timestamp(f).strftime('%Y-%m-%d') if f is not None else '' for f in (fecha_inicio, fecha_fin)]
+        texto = json.dumps([str(version), ticker, *fechas, vista])
+        return hashlib.sha1(texto.encode("utf-8")).hexdigest()
+
+    def ruta_figura(self, clave):
+        return os.path.join(self.ruta, f"{clave}.json")
+
+    @staticmethod
+    def _tamano(fig):
+        """Bytes aproximados de la figura: sus arreglos de datos más un margen fijo"""
+        total = 16 * 1024
+        for traza in fig.data:
+            for eje in ('x', 'y', 'z'):
+                valores = getattr(traza, eje, None)
+                if valores is not None:
+                    total += np.asarray(valores).size * 16
+        return total
+
+    def obtener(self, clave, construir, persistir=False):
+        """
+        Figura de la clave: memoria, luego disco y si no, `construir()`. Con
+        `persistir` la especificación se escribe también en disco.
+        """
+        with self.lock:
+            if clave in self.memoria:
+                self.memoria.move_to_end(clave)
+                self.aciertos_memoria += 1
+                return self.memoria[clave][0]
+
+        ruta = self.ruta_figura(clave)
+        fig = None
+        try:
+            with open(ruta, encoding="utf-8") as f:
+                spec = f.read()
+            fig = pio.from_json(spec, skip_invalid=True)
+            os.utime(ruta)
+            tamano = len(spec)
+            self.aciertos_disco += 1
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            self.logger.warning("FigureCache", "obtener", f"Especificación inválida {clave}: {e}")
+
+        if fig is None:
+            fig = construir()
+            tamano = self._tamano(fig)
+            self.fallos += 1
+            if persistir:
+                self.escribir(clave, fig)
+
+        self._guardar_memoria(clave, fig, tamano)
+        return fig
+
+    def escribir(self, clave, fig):
+        """Escribe la especificación JSON de forma atómica y recorta el directorio"""
+        try:
+            ruta = self.ruta_figura(clave)
+            with open(ruta + ".tmp", "w", encoding="utf-8") as f:
+                f.write(fig.to_json())
+            os.replace(ruta + ".tmp", ruta)
+            self._recortar_disco()
+        except Exception as e:
+            self.logger.error("FigureCache", "escribir", f"Error al guardar figura {clave}: {e}")
+
+    def _guardar_memoria(self, clave, fig, tamano):
+        with self.lock:
+            if clave in self.memoria:
+                self.bytes -= self.memoria[clave][1]
+            self.memoria[clave] = (fig, tamano)
+            self.memoria.move_to_end(clave)
+            self.bytes += tamano
+            while self.bytes > self.max_bytes and len(self.memoria) > 1:
+                _, (_, liberado) = self.memoria.popitem(last=False)
+                self.bytes -= liberado
+
+    def _recortar_disco(self):
+        """Borra las especificaciones usadas hace más tiempo hasta quedar bajo el límite"""
+        archivos = [e for e in os.scandir(self.ruta) if e.name.endswith(".json")]
+        total = sum(e.stat().st_size for e in archivos)
+        for entrada in sorted(archivos, key=lambda e: e.stat().st_mtime_ns):
+            if total <= self.max_bytes_disco:
+                break
+            total -= entrada.stat().st_size
+            os.remove(entrada.path)
+
+    def estadisticas(self):
+        return {
+            'figuras_en_memoria': len(self.memoria),
+            'bytes_en_memoria': self.bytes,
+            'aciertos_memoria': self.aciertos_memoria,
+            'aciertos_disco': self.aciertos_disco,
+            'fallos': self.fallos,
+        }
+
+# =================== CONSTRUCTORES DE FIGURAS ===================
+def figura_kpi(df_vista, kpi, downsampler):
+    df_kpi = downsampler.reducir(df_vista, 'fecha', kpi)
+
+    # Configurar formato según el tipo de indicador
+    if kpi in ['retorno_diario', 'tasa_variacion_ac', 'retorno_acumulado']:
+        y_values = df_kpi[kpi] * 100  # Convertir a porcentaje
+    else:
+        y_values = df_kpi[kpi]
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=df_kpi['fecha'],
+        y=y_values,
+        mode='lines',
+        name=KPIS[kpi],
+        line=dict(color='#1877f2', width=2),
+        hovertemplate='<b>Fecha:</b> %{x}<br><b>Valor:</b> %{y}<extra></extra>'
+    ))
+
+    fig.update_layout(
+        title=f'📈 {KPIS[kpi]} - Evolución Temporal',
+        xaxis_title='Fecha',
+        yaxis_title=KPIS[kpi],
+        template='plotly_white',
+        hovermode='x unified',
+        showlegend=False,
+        height=500
+    )
+    return fig
+
+def figura_precio_volumen(df_vista, downsampler):
+    fig = make_subplots(
+        rows=2, cols=1,
+        subplot_titles=('Precio de Cierre y Media Móvil', 'Volumen'),
+        vertical_spacing=0.1,
+        row_heights=[0.7, 0.3]
+    )
+
+    df_cierre = downsampler.reducir(df_vista, 'fecha', 'cerrar')
+    df_media = downsampler.reducir(df_vista, 'fecha', 'media_movil_5d')
+    df_volumen = downsampler.reducir(df_vista, 'fecha', 'volumen', metodo='min_max')
+
+    # Precio de cierre
+    fig.add_trace(
+        go.Scatter(x=df_cierre['fecha'], y=df_cierre['cerrar'],
+                   name='Precio de Cierre', line=dict(color='#1877f2')),
+        row=1, col=1
+    )
+
+    # Media móvil
+    fig.add_trace(
+        go.Scatter(x=df_media['fecha'], y=df_media['media_movil_5d'],
+                   name='Media Móvil 5D', line=dict(color='#ff6b6b', dash='dash')),
+        row=1, col=1
+    )
+
+    # Volumen
+    fig.add_trace(
+        go.Bar(x=df_volumen['fecha'], y=df_volumen['volumen'],
+               name='Volumen', marker_color='#95a5a6'),
+        row=2, col=1
+    )
+
+    fig.update_layout(height=600, template='plotly_white')
+    fig.update_xaxes(title_text="Fecha", row=2, col=1)
+    fig.update_yaxes(title_text="Precio ($)", row=1, col=1)
+    fig.update_yaxes(title_text="Volumen", row=2, col=1)
+    return fig
+
+def figura_histograma(df_filtered):
+    fig = px.histogram(df_filtered, x='retorno_diario', nbins=30,
+                       title='Distribución del Retorno Diario')
+    fig.update_layout(template='plotly_white')
+    return fig
+
+def figura_volatilidad(df_vista, downsampler):
+    fig = px.line(downsampler.reducir(df_vista, 'fecha', 'volatilidad'),
+                  x='fecha', y='volatilidad',
+                  title='Evolución de la Volatilidad')
+    fig.update_layout(template='plotly_white')
+    return fig
+
+def figura_correlacion(corr_matrix):
+    fig = px.imshow(corr_matrix,
+                    title='Matriz de Correlación de Indicadores Financieros',
+                    color_continuous_scale='RdBu_r',
+                    aspect='auto')
+    fig.update_layout(template='plotly_white', height=500)
+    return fig
+
+def figura_precision(df_precision):
+    fig = go.Figure()
+    for metrica, color in [('mae', '#1877f2'), ('rmse', '#ff6b6b')]:
+        fig.add_trace(go.Scatter(
+            x=df_precision['horizonte'],
+            y=df_precision[metrica],
+            mode='lines+markers',
+            name=metrica.upper(),
+            line=dict(color=color, width=2)
+        ))
+    fig.update_layout(
+        xaxis_title='Horizonte (días hábiles)',
+        yaxis_title='Error ($)',
+        template='plotly_white',
+        height=350
+    )
+    return fig
+
+def figura_modelo(serie_real, serie_pred, downsampler):
+    serie_real = downsampler.reducir_serie(serie_real)
+    serie_pred = downsampler.reducir_serie(serie_pred)
+
+    fig = go.Figure()
+
+    # Serie real
+    fig.add_trace(go.Scatter(
+        x=serie_real.index,
+        y=serie_real.values,
+        mode='lines',
+        name='Valores Reales',
+        line=dict(color='#1877f2', width=2)
+    ))
+
+    # Predicciones del modelo
+    fig.add_trace(go.Scatter(
+        x=serie_pred.index,
+        y=serie_pred.values,
+        mode='lines',
+        name='ARIMA Ajustado',
+        line=dict(color='#ff6b6b', dash='dash', width=2)
+    ))
+
+    fig.update_layout(
+        title='Serie de Tiempo: Comparación Modelo vs Realidad',
+        xaxis_title='Período',
+        yaxis_title='Precio de Cierre Ajustado ($)',
+        template='plotly_white',
+        hovermode='x unified',
+        height=500
+    )
+    return fig
+
+def figura_predicciones(df, df_predictions):
+    fig = go.Figure()
+
+    # Datos históricos (últimos 30 días)
+    df_recent = df.tail(30)
+    fig.add_trace(go.Scatter(
+        x=df_recent['fecha'],
+        y=df_recent['cerrar'],
+        mode='lines',
+        name='Histórico',
+        line=dict(color='#1877f2', width=2)
+    ))
+
+    # Predicciones
+    fig.add_trace(go.Scatter(
+        x=df_predictions['fecha'],
+        y=df_predictions['cerrar'],
+        mode='lines',
+        name='Predicciones',
+        line=dict(color='#28a745', width=2, dash='dash')
+    ))
+
+    fig.update_layout(
+        title='Predicciones vs Datos Históricos',
+        xaxis_title='Fecha',
+        yaxis_title='Precio ($)',
+        template='plotly_white',
+        height=400
+    )
+    return fig
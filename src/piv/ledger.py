@@ -0,0 +1,138 @@
+import os
+import numpy as np
+import pandas as pd
+
+class ForecastLedger:
+    """
+    Registro append-only de pronósticos por (ticker, fecha de emisión, fecha
+    objetivo, versión del modelo). Los pronósticos aún sin dato real viven
+    también en pendientes.csv; al llegar barras nuevas solo se cruzan esos
+    pendientes y sus errores se suman a acumulados por horizonte, sin volver a
+    leer el registro completo. Los pendientes cuya fecha objetivo quedó atrás
+    sin barra (feriados) se descartan.
+    """
+
+    CLAVE = ['ticker', 'fecha_emision', 'fecha_objetivo', 'version']
+
+    def __init__(self, logger, ticker='META', ruta=None):
+        self.logger = logger
+        self.ticker = ticker
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        self.ruta = os.path.join(ruta or os.path.join(base_dir, "static", "data", "ledger"), ticker)
+        self.ruta_registro = os.path.join(self.ruta, "pronosticos.csv")
+        self.ruta_pendientes = os.path.join(self.ruta, "pendientes.csv")
+        self.ruta_metricas = os.path.join(self.ruta, "metricas.csv")
+        os.makedirs(self.ruta, exist_ok=True)
+
+    def _leer(self, ruta, fechas=('fecha_emision', 'fecha_objetivo'), columnas=None):
+        if not os.path.exists(ruta):
+            return pd.DataFrame()
+        # La versión es un hash: solo dígitos no debe leerse como entero
+        df = pd.read_csv(ruta, dtype={'version': str}, usecols=columnas)
+        for col in fechas:
+            if col in df.columns:
+                df[col] = pd.to_datetime(df[col])
+        return df
+
+    def _escribir(self, ruta, df):
+        df.to_csv(ruta + ".tmp", index=False)
+        os.replace(ruta + ".tmp", ruta)
+
+    def registrar(self, fecha_emision, fechas_objetivo, pronosticos, version):
+        """Agrega un pronóstico (un valor por fecha objetivo) al registro y a pendientes"""
+        if version is None:
+            self.logger.warning("ForecastLedger", "registrar", f"Pronóstico de {self.ticker} sin versión de modelo, no se registra")
+            return 0
+        try:
+            nuevos = pd.DataFrame({
+                'ticker': self.ticker,
+                'fecha_emision': pd.Timestamp(fecha_emision).normalize(),
+                'fecha_objetivo': pd.to_datetime(list(fechas_objetivo)).normalize(),
+                'version': str(version),
+                'horizonte': np.arange(1, len(pronosticos) + 1),
+                'pronostico': list(pronosticos),
+            })
+
+            # Reejecutar el mismo día con el mismo modelo no duplica filas, aunque
+            # sus fechas objetivo ya se hayan resuelto y no estén en pendientes
+            registrados = self._leer(self.ruta_registro, columnas=self.CLAVE)
+            if not registrados.empty:
+                repetidos = nuevos.merge(registrados.drop_duplicates(), on=self.CLAVE, how='left', indicator=True)
+                nuevos = nuevos[(repetidos['_merge'] == 'left_only').to_numpy()]
+            if nuevos.empty:
+                return 0
+
+            pendientes = self._leer(self.ruta_pendientes)
+
+            nuevos.to_csv(self.ruta_registro, mode='a', header=not os.path.exists(self.ruta_registro), index=False)
+            self._escribir(self.ruta_pendientes, pd.concat([pendientes, nuevos], ignore_index=True))
+
+            self.logger.info("ForecastLedger", "registrar", f"{len(nuevos)} pronóstico(s) de {self.ticker} registrados")
+            return len(nuevos)
+
+        except Exception as e:
+            self.logger.error("ForecastLedger", "registrar", f"Error al registrar pronóstico: {e}")
+            return 0
+
+    def actualizar(self, df_reales, columna='cierre_ajustado'):
+        """
+        Cruza los pendientes con las barras reales y suma sus errores a los
+        acumulados por horizonte; los pendientes resueltos salen del archivo.
+        """
+        try:
+            pendientes = self._leer(self.ruta_pendientes)
+            if pendientes.empty:
+                return 0
+
+            reales = df_reales[['fecha', columna]].dropna().copy()
+            reales['fecha_objetivo'] = pd.to_datetime(reales['fecha']).dt.normalize()
+            reales = reales.drop_duplicates('fecha_objetivo', keep='last')[['fecha_objetivo', columna]]
+
+            cruce = pendientes.merge(reales, on='fecha_objetivo', how='left')
+            resueltos = cruce[cruce[columna].notna()]
+
+            # Sin barra en su fecha objetivo pero ya superada (feriado): no se resolverá nunca
+            vencidos = cruce[columna].isna() & (cruce['fecha_objetivo'] < reales['fecha_objetivo'].max())
+            if vencidos.any():
+                self.logger.warning("ForecastLedger", "actualizar",
+                                    f"{int(vencidos.sum())} pronóstico(s) de {self.ticker} sin barra en su fecha objetivo descartados")
+            if resueltos.empty:
+                if vencidos.any():
+                    self._escribir(self.ruta_pendientes, cruce[~vencidos][pendientes.columns])
+                return 0
+
+            error = resueltos['pronostico'] - resueltos[columna]
+            nuevas = pd.DataFrame({
+                'horizonte': resueltos['horizonte'],
+                'n': 1,
+                'suma_abs': error.abs(),
+                'suma_cuad': error ** 2,
+                'suma_pct': (error / resueltos[columna]).abs() * 100,
+            }).groupby('horizonte').sum()
+
+            acumuladas = self._leer(self.ruta_metricas, fechas=())
+            if not acumuladas.empty:
+                nuevas = nuevas.add(acumuladas.set_index('horizonte')[nuevas.columns], fill_value=0)
+                nuevas['n'] = nuevas['n'].astype(int)
+            self._escribir(self.ruta_metricas, nuevas.reset_index())
+            self._escribir(self.ruta_pendientes, cruce[cruce[columna].isna() & ~vencidos][pendientes.columns])
+
+            self.logger.info("ForecastLedger", "actualizar", f"{len(resueltos)} pronóstico(s) de {self.ticker} resueltos")
+            return len(resueltos)
+
+        except Exception as e:
+            self.logger.error("ForecastLedger", "actualizar", f"Error al actualizar métricas: {e}")
+            return 0
+
+    def metricas(self):
+        """MAE, RMSE y MAPE fuera de muestra por horizonte"""
+        acumuladas = self._leer(self.ruta_metricas, fechas=())
+        if acumuladas.empty:
+            return acumuladas
+        return pd.DataFrame({
+            'horizonte': acumuladas['horizonte'],
+            'n': acumuladas['n'],
+            'mae': acumuladas['suma_abs'] / acumuladas['n'],
+            'rmse': np.sqrt(acumuladas['suma_cuad'] / acumuladas['n']),
+            'mape': acumuladas['suma_pct'] / acumuladas['n'],
+        })
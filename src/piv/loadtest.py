@@ -0,0 +1,54 @@
+import json
+import time
+import random
+import argparse
+import threading
+import numpy as np
+from urllib.request import urlopen
+
+def cliente(url, tickers, horizonte_maximo, fin, latencias, errores):
+    while time.perf_counter() < fin:
+        ticker = random.choice(tickers)
+        horizonte = random.randint(1, horizonte_maximo)
+        inicio = time.perf_counter()
+        try:
+            with urlopen(f"{url}/pronostico?ticker={ticker}&horizonte={horizonte}", timeout=30) as respuesta:
+                respuesta.read()
+            latencias.append(time.perf_counter() - inicio)
+        except Exception:
+            errores.append(1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga local del servicio de pronósticos")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--tickers", nargs="+", default=["META"])
+    parser.add_argument("--concurrencia", type=int, default=32, help="Clientes simultáneos")
+    parser.add_argument("--duracion", type=float, default=10, help="Segundos de prueba")
+    parser.add_argument("--horizonte", type=int, default=30, help="Horizonte máximo por solicitud")
+    args = parser.parse_args()
+
+    latencias, errores = [], []
+    fin = time.perf_counter() + args.duracion
+    hilos = [
+        threading.Thread(target=cliente, args=(args.url, args.tickers, args.horizonte, fin, latencias, errores))
+        for _ in range(args.concurrencia)
+    ]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    duracion = time.perf_counter() - inicio
+
+    ms = np.array(latencias) * 1000
+    print(f"Solicitudes: {len(latencias)} ok, {len(errores)} con error en {duracion:.1f}s")
+    print(f"Throughput: {len(latencias) / duracion:.0f} solicitudes/s")
+    if len(ms):
+        p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+        print(f"Latencia cliente: p50={p50:.1f}ms p95={p95:.1f}ms p99={p99:.1f}ms")
+
+    with urlopen(f"{args.url}/metricas", timeout=30) as respuesta:
+        print("Métricas del servidor:", json.loads(respuesta.read()))
+
+if __name__ == "__main__":
+    main()
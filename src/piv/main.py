@@ -2,6 +2,18 @@ from logger import Logger
 from collector import Collector
 from enricher import Enricher
 from modeller import Modeller 
+from aggregator import Aggregator
+from arraycache import ArrayCache
+from validator import Validator
+from ledger import ForecastLedger
+from downsampler import Downsampler
+from correlator import Correlator
+from figures import (FigureCache, vista, KPIS, COLUMNAS_CORRELACION, ANCHO_POR_DEFECTO,
+                     figura_kpi, figura_precio_volumen, figura_histograma, figura_volatilidad,
+                     figura_correlacion, figura_modelo, figura_predicciones)
+
+import os
+import pickle
 
 import pandas as pd
 import numpy as np
@@ -26,6 +38,18 @@ def main():
         if col in df.columns:
             df[col] = pd.to_numeric(df[col], errors='coerce')
 
+    # ========== VALIDAR CALIDAD Y PONER EN CUARENTENA ==========
+    validator = Validator(logger)
+    df, df_cuarentena = validator.validar(df)
+    path_cuarentena = "src/piv/static/data/meta_cuarentena.csv"
+    df_cuarentena.to_csv(path_cuarentena, index=False, float_format='%.2f')
+    print(f"Filas en cuarentena: {len(df_cuarentena)} ({path_cuarentena})")
+
+    # ========== PRECISIÓN DE PRONÓSTICOS ANTERIORES ==========
+    ledger = ForecastLedger(logger)
+    resueltos = ledger.actualizar(df)
+    print(f"Pronósticos anteriores contrastados con datos reales: {resueltos}")
+
     # ========== GUARDAR META_HISTORY.CSV ==========
     columnas_base = ['fecha'] + columnas_numericas
     df_crudo = df[columnas_base].copy()
@@ -47,17 +71,35 @@ def main():
     df_enriched_final.to_csv(path_enriched, index=False, float_format='%.4f')
     print(f"CSV enriquecido guardado: {path_enriched}")
 
+    # Memoria del frame enriquecido con el esquema compacto que usa el dashboard
+    reporte = enricher.reporte_memoria(df_enriched_final)
+    print(f"Memoria enriquecido: {reporte.loc['TOTAL', 'bytes_original'] / 1e6:.2f} MB -> "
+          f"{reporte.loc['TOTAL', 'bytes_compacto'] / 1e6:.2f} MB (esquema compacto)")
+
+    # Arreglos memory-mapped que comparten todos los procesos del dashboard
+    publicar_compacto(df_enriched_final, 'enriquecido', enricher, logger)
+
+    # ========== AGREGADOS SEMANALES / MENSUALES / ANUALES ==========
+    aggregator = Aggregator(logger)
+    if aggregator.actualizar_archivos(df_enriched_final):
+        print("Agregados semanal, mensual y anual actualizados.")
+
     # ========== ENTRENAR Y GUARDAR MODELO ==========
     modeller = Modeller(logger)
     
-    # Convertir fechas de vuelta a datetime para el entrenamiento
+    # Convertir fechas de vuelta a datetime para el entrenamiento. Yahoo entrega
+    # las filas de la más reciente a la más antigua: ARIMA necesita orden cronológico
     df_para_modelo = df_crudo.copy()
     df_para_modelo['fecha'] = pd.to_datetime(df_para_modelo['fecha'])
+    df_para_modelo = df_para_modelo.sort_values('fecha').reset_index(drop=True)
     
     resultado_entrenamiento = modeller.entrenar(df_para_modelo)
 
     if resultado_entrenamiento:
         print("Modelo entrenado y guardado correctamente.")
+
+        # Pronóstico hasta el horizonte máximo para servir el dashboard desde cache
+        modeller.precalcular_pronostico()
         
         # ========== GENERAR PREDICCIONES ==========
         generar_archivo_predicciones(df_para_modelo, modeller, enricher, logger)
@@ -65,6 +107,10 @@ def main():
     else:
         print("Error al entrenar o guardar el modelo.")
 
+    # ========== PRE-RENDERIZAR VISTAS POR DEFECTO DEL DASHBOARD ==========
+    figuras = prerenderizar_figuras(path_enriched, modeller, enricher, logger)
+    print(f"Figuras pre-renderizadas: {figuras}")
+
     # Control visual
     print("\n--- Vista previa crudo ---")
     print(df_crudo.head())
@@ -72,13 +118,88 @@ def main():
     print(df_enriched_final.head())
 
 
+def publicar_compacto(df, nombre, enricher, logger):
+    """
+    Publica el frame con esquema compacto en el cache de arreglos mapeados
+    """
+    df = df.copy()
+    df['fecha'] = pd.to_datetime(df['fecha'])
+    ArrayCache(logger).publicar(nombre, enricher.compactar(df))
+
+
+def prerenderizar_figuras(path_enriched, modeller, enricher, logger):
+    """
+    Escribe en el cache de figuras las vistas con que abre el dashboard (rango
+    completo, ancho por defecto), con las mismas claves que usa dashboard.py,
+    para que la primera visita no construya ni serialice esas figuras.
+    """
+    try:
+        df = ArrayCache(logger).cargar('enriquecido')
+        if df.empty:
+            return 0
+
+        cache = FigureCache(logger)
+        ticker = modeller.TICKER_POR_DEFECTO
+        firma_datos = FigureCache.firma(path_enriched)
+        fecha_inicio, fecha_fin = df['fecha'].min(), df['fecha'].max()
+        downsampler = Downsampler(puntos_max=2 * ANCHO_POR_DEFECTO)
+
+        # Misma elección de resolución que el dashboard para el rango completo
+        aggregator = Aggregator(logger)
+        resolucion = aggregator.elegir_resolucion(fecha_inicio, fecha_fin)
+        df_vista = df
+        if resolucion != 'diario' and os.path.exists(aggregator.ruta(resolucion)):
+            df_agregado = pd.read_csv(aggregator.ruta(resolucion), parse_dates=['fecha', 'fecha_inicio'])
+            df_vista = aggregator.filtrar(df_agregado, fecha_inicio, fecha_fin)
+        else:
+            resolucion = 'diario'
+
+        vistas = {vista('kpi', kpi=kpi, ancho=ANCHO_POR_DEFECTO, resolucion=resolucion):
+                  (lambda kpi=kpi: figura_kpi(df_vista, kpi, downsampler)) for kpi in KPIS}
+        vistas[vista('precio_volumen', ancho=ANCHO_POR_DEFECTO, resolucion=resolucion)] = \
+            lambda: figura_precio_volumen(df_vista, downsampler)
+        vistas[vista('histograma')] = lambda: figura_histograma(df)
+        vistas[vista('volatilidad', ancho=ANCHO_POR_DEFECTO, resolucion=resolucion)] = \
+            lambda: figura_volatilidad(df_vista, downsampler)
+        vistas[vista('correlacion', ventana=0)] = \
+            lambda: figura_correlacion(Correlator().correlacion(df.set_index('fecha')[COLUMNAS_CORRELACION]))
+
+        for nombre, construir in vistas.items():
+            clave = FigureCache.clave(firma_datos, ticker, fecha_inicio, fecha_fin, nombre)
+            cache.obtener(clave, construir, persistir=True)
+
+        # Vistas sin rango de fechas: ajuste del modelo y predicciones precalculadas
+        if os.path.exists(modeller.model_file):
+            with open(modeller.model_file, "rb") as f:
+                modelo = pickle.load(f)
+            df_csv = enricher.compactar(pd.read_csv(path_enriched, parse_dates=['fecha']))
+            serie_real = df_csv.dropna(subset=['cierre_ajustado'])['cierre_ajustado']
+            clave = FigureCache.clave((firma_datos, FigureCache.firma(modeller.model_file)), ticker, None, None,
+                                      vista('modelo', ancho=ANCHO_POR_DEFECTO))
+            cache.obtener(clave, lambda: figura_modelo(serie_real, modelo.fittedvalues, downsampler), persistir=True)
+
+        df_predicciones = ArrayCache(logger).cargar('predicciones')
+        if not df_predicciones.empty:
+            path_predicciones = "src/piv/static/data/meta_predicciones.csv"
+            clave = FigureCache.clave((firma_datos, FigureCache.firma(path_predicciones)), ticker, None, None,
+                                      vista('predicciones'))
+            cache.obtener(clave, lambda: figura_predicciones(df, df_predicciones), persistir=True)
+
+        logger.info("Main", "prerenderizar_figuras", f"Figuras pre-renderizadas: {cache.estadisticas()}")
+        return cache.fallos
+
+    except Exception as e:
+        logger.error("Main", "prerenderizar_figuras", f"Error: {str(e)}")
+        return 0
+
+
 def generar_archivo_predicciones(df_historico, modeller, enricher, logger):
     """
     Genera solo el archivo de predicciones
     """
     try:
         # Configuración de predicciones
-        dias_prediccion = 30  # Predecir 30 días hacia el futuro
+        dias_prediccion = modeller.HORIZONTE_MAXIMO  # Predecir 30 días hacia el futuro
         
         # Obtener la última fecha del dataset histórico
         ultima_fecha = df_historico['fecha'].max()
@@ -162,6 +283,10 @@ def generar_archivo_predicciones(df_historico, modeller, enricher, logger):
         # ========== GUARDAR ARCHIVO DE PREDICCIONES ==========
         path_predicciones = "src/piv/static/data/meta_predicciones.csv"
         df_predicciones_enriquecido.to_csv(path_predicciones, index=False, float_format='%.4f')
+        publicar_compacto(df_predicciones_enriquecido, 'predicciones', enricher, logger)
+
+        # Registro append-only para medir la precisión cuando lleguen los datos reales
+        ForecastLedger(logger).registrar(ultima_fecha, fechas_futuras, predicciones, modeller.version_modelo())
         
         print(f"\n=== Archivo de Predicciones Generado ===")
         print(f"CSV predicciones: {path_predicciones}")
@@ -1,16 +1,25 @@
 import os
 import pickle
+import hashlib
 import pandas as pd
 import numpy as np
 from statsmodels.tsa.arima.model import ARIMA
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 
 class Modeller:
-    def __init__(self, logger):
+    HORIZONTE_MAXIMO = 30
+    TICKER_POR_DEFECTO = 'META'
+
+    def __init__(self, logger, ticker=None):
         self.logger = logger
+        self.ticker = ticker or self.TICKER_POR_DEFECTO
         base_dir = os.path.dirname(os.path.abspath(__file__))
         self.model_path = os.path.join(base_dir, "static", "data", "models")
-        self.model_file = os.path.join(self.model_path, "model.pkl")
+
+        # El ticker por defecto conserva los nombres históricos de los archivos
+        sufijo = "" if self.ticker == self.TICKER_POR_DEFECTO else f"_{self.ticker}"
+        self.model_file = os.path.join(self.model_path, f"model{sufijo}.pkl")
+        self.forecast_cache_file = os.path.join(self.model_path, f"forecast_cache{sufijo}.csv")
 
         if not os.path.exists(self.model_path):
             os.makedirs(self.model_path)
@@ -84,7 +93,6 @@ class Modeller:
         Carga el modelo desde disco y realiza predicción futura.
         """
         try:
-            df = df.copy()
             with open(self.model_file, 'rb') as f:
                 model_fit = pickle.load(f)
 
@@ -96,3 +104,211 @@ class Modeller:
             self.logger.error("Modeller", "predecir", f"Error en predicción: {str(e)}")
             return []
 
+    def cargar_modelo(self):
+        """
+        Carga el modelo entrenado desde disco para mantenerlo residente en
+        memoria. Devuelve (modelo, versión): ambos salen de los mismos bytes,
+        aunque el archivo se reescriba entre lecturas.
+        """
+        with open(self.model_file, 'rb') as f:
+            datos = f.read()
+        return pickle.loads(datos), hashlib.sha1(datos).hexdigest()[:12]
+
+    def version_modelo(self):
+        """Hash corto del contenido de model.pkl, identifica la versión del modelo"""
+        try:
+            with open(self.model_file, 'rb') as f:
+                return hashlib.sha1(f.read()).hexdigest()[:12]
+        except OSError:
+            return None
+
+    def precalcular_pronostico(self, steps=None):
+        """
+        Calcula el pronóstico hasta el horizonte máximo y lo guarda junto con la
+        versión del modelo, para que el dashboard sirva cualquier horizonte
+        menor recortando este resultado.
+        """
+        steps = steps or self.HORIZONTE_MAXIMO
+        try:
+            forecast = self.predecir(None, steps=steps)
+            if not forecast:
+                return False
+
+            pd.DataFrame({
+                'version': self.version_modelo(),
+                'paso': range(1, len(forecast) + 1),
+                'pronostico': forecast
+            }).to_csv(self.forecast_cache_file, index=False)
+
+            self.logger.info("Modeller", "precalcular_pronostico", f"Pronóstico precalculado para {steps} paso(s)")
+            return True
+
+        except Exception as e:
+            self.logger.error("Modeller", "precalcular_pronostico", f"Error al precalcular pronóstico: {str(e)}")
+            return False
+
+    def pronostico_cacheado(self, steps=1, version=None):
+        """
+        Devuelve los primeros `steps` valores del pronóstico precalculado si
+        corresponde a la versión actual del modelo; si no, predice en vivo.
+        """
+        version = version or self.version_modelo()
+        try:
+            if os.path.exists(self.forecast_cache_file):
+                # Un hash solo de dígitos se leería como entero y perdería los ceros iniciales
+                cache = pd.read_csv(self.forecast_cache_file, dtype={'version': str})
+                if len(cache) >= steps and (cache['version'] == str(version)).all():
+                    return cache['pronostico'].iloc[:steps].tolist()
+        except Exception as e:
+            self.logger.warning("Modeller", "pronostico_cacheado", f"Cache de pronóstico no disponible: {str(e)}")
+
+        return self.predecir(None, steps=steps)
+
+class BaselineModeller:
+    """
+    Segundo motor de pronóstico: baselines ajustados para todos los tickers a
+    la vez como operaciones NumPy sobre una matriz (tickers x tiempo), sin un
+    modelo de statsmodels por serie. Para cada ticker se elige, con un tramo
+    de validación, el mejor entre:
+    - ses: suavizado exponencial simple, alfa buscado en una grilla vectorizada.
+    - drift: último valor más la pendiente promedio de la serie.
+    - naive_estacional: repite el último ciclo de `temporada` días.
+    """
+
+    METODOS = ['ses', 'drift', 'naive_estacional']
+    ALFAS = np.linspace(0.05, 1.0, 20)
+
+    def __init__(self, logger, temporada=5, validacion=20):
+        self.logger = logger
+        self.temporada = temporada
+        self.validacion = validacion
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        self.model_path = os.path.join(base_dir, "static", "data", "models")
+        self.model_file = os.path.join(self.model_path, "baseline.pkl")
+
+        if not os.path.exists(self.model_path):
+            os.makedirs(self.model_path)
+
+    def matriz(self, df, columna="cierre_ajustado"):
+        """
+        Matriz (tickers x fechas) desde un frame largo con 'ticker', 'fecha' y
+        `columna`; sin columna 'ticker' se asume el ticker por defecto. Los
+        huecos se rellenan con el último valor conocido.
+        """
+        df = df.dropna(subset=[columna])
+        if 'ticker' not in df.columns:
+            df = df.assign(ticker=Modeller.TICKER_POR_DEFECTO)
+        tabla = df.pivot_table(index='ticker', columns='fecha', values=columna, aggfunc='last')
+        tabla = tabla.sort_index(axis=1).ffill(axis=1).bfill(axis=1)
+        return list(tabla.index), tabla.to_numpy(dtype=float)
+
+    def _ses(self, Y):
+        """Nivel final y SSE de un paso para cada (ticker, alfa)"""
+        nivel = np.repeat(Y[:, :1], len(self.ALFAS), axis=1)
+        sse = np.zeros_like(nivel)
+        for t in range(1, Y.shape[1]):
+            error = Y[:, t:t + 1] - nivel
+            sse += error ** 2
+            nivel += self.ALFAS * error
+        return nivel, sse
+
+    def ajustar(self, Y):
+        """Parámetros de los tres métodos para todas las filas de Y"""
+        nivel, sse = self._ses(Y)
+        mejor = sse.argmin(axis=1)
+        filas = np.arange(len(Y))
+        return {
+            'alfa': self.ALFAS[mejor],
+            'nivel': nivel[filas, mejor],
+            'ultimo': Y[:, -1],
+            'pendiente': (Y[:, -1] - Y[:, 0]) / max(Y.shape[1] - 1, 1),
+            'ciclo': Y[:, -self.temporada:],
+        }
+
+    def pronosticar(self, parametros, steps, metodo=None):
+        """
+        Pronóstico (tickers x steps). Con `metodo` se usa ese para todos; si no,
+        el elegido por ticker en `parametros['metodo']`.
+        """
+        h = np.arange(1, steps + 1)
+        candidatos = {
+            'ses': np.repeat(parametros['nivel'][:, None], steps, axis=1),
+            'drift': parametros['ultimo'][:, None] + parametros['pendiente'][:, None] * h,
+            'naive_estacional': parametros['ciclo'][:, (h - 1) % parametros['ciclo'].shape[1]],
+        }
+        if metodo is not None:
+            return candidatos[metodo]
+
+        apilados = np.stack([candidatos[m] for m in self.METODOS])
+        indices = np.array([self.METODOS.index(m) for m in parametros['metodo']])
+        return apilados[indices, np.arange(len(indices))]
+
+    def seleccionar(self, Y):
+        """Mejor método por fila de Y según el MAE sobre los últimos `validacion` días"""
+        v = self.validacion
+        if Y.shape[1] <= v + self.temporada + 1:
+            return ['ses'] * len(Y)
+        parametros = self.ajustar(Y[:, :-v])
+        mae = np.stack([np.abs(self.pronosticar(parametros, v, m) - Y[:, -v:]).mean(axis=1) for m in self.METODOS])
+        return [self.METODOS[i] for i in mae.argmin(axis=0)]
+
+    def entrenar(self, df):
+        """
+        Ajusta los baselines de todos los tickers, elige el mejor método por
+        ticker según el MAE del tramo de validación y guarda el artefacto.
+        """
+        try:
+            tickers, Y = self.matriz(df)
+            metodos = self.seleccionar(Y)
+            v = self.validacion if Y.shape[1] > self.validacion + self.temporada + 1 else 0
+
+            parametros = self.ajustar(Y)
+            parametros['metodo'] = metodos
+            parametros['tickers'] = tickers
+
+            if v:
+                reales = Y[:, -v:]
+                pred = self.pronosticar(dict(self.ajustar(Y[:, :-v]), metodo=metodos), v)
+                mae = mean_absolute_error(reales.ravel(), pred.ravel())
+                rmse = np.sqrt(mean_squared_error(reales.ravel(), pred.ravel()))
+                mape = np.mean(np.abs((reales - pred) / reales)) * 100
+                conteo = {m: metodos.count(m) for m in self.METODOS}
+                self.logger.info(
+                    "BaselineModeller",
+                    "entrenar",
+                    f"Entrenamiento exitoso para {len(tickers)} ticker(s). Métodos: {conteo}. "
+                    f"Validación {v} días - MAE: {mae:.2f}, RMSE: {rmse:.2f}, MAPE: {mape:.2f}%"
+                )
+
+            with open(self.model_file, "wb") as f:
+                pickle.dump(parametros, f)
+
+            return True
+
+        except Exception as e:
+            self.logger.error("BaselineModeller", "entrenar", f"Error en entrenamiento: {str(e)}")
+            return False
+
+    def predecir(self, df, steps=1, ticker=None):
+        """
+        Misma interfaz que Modeller.predecir: lista de `steps` valores para el
+        ticker indicado (o el único/por defecto).
+        """
+        try:
+            tabla = self.predecir_todos(steps)
+            if ticker is None:
+                ticker = tabla.index[0] if len(tabla) == 1 else Modeller.TICKER_POR_DEFECTO
+            forecast = tabla.loc[ticker].tolist()
+            self.logger.info("BaselineModeller", "predecir", f"Predicción de {ticker} para {steps} paso(s)")
+            return forecast
+
+        except Exception as e:
+            self.logger.error("BaselineModeller", "predecir", f"Error en predicción: {str(e)}")
+            return []
+
+    def predecir_todos(self, steps=1):
+        """Pronóstico de todo el universo como DataFrame (tickers x pasos)"""
+        with open(self.model_file, 'rb') as f:
+            parametros = pickle.load(f)
+        return pd.DataFrame(self.pronosticar(parametros, steps), index=parametros['tickers'],
+                            columns=range(1, steps + 1))
@@ -0,0 +1,364 @@
+import os
+import json
+import time
+import queue
+import argparse
+import threading
+import pandas as pd
+from datetime import date
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from logger import Logger
+from collector import Collector
+from validator import Validator
+from enricher import Enricher
+from modeller import Modeller
+from ledger import ForecastLedger
+
+ETAPAS = ['recolectar', 'validar', 'enriquecer', 'entrenar', 'pronosticar']
+
+_logger = None
+
+def obtener_logger():
+    """Un Logger por proceso: cada Logger() agrega un handler al logger base"""
+    global _logger
+    if _logger is None:
+        _logger = Logger()
+    return _logger
+
+class TickerPipeline:
+    """
+    Ejecuta las etapas de un ticker guardando un checkpoint tras cada una:
+    el artefacto de la etapa en disco y su estado en estado.json. Los
+    checkpoints pertenecen a una ejecución (por defecto, la fecha del día): al
+    volver a ejecutar con la misma se continúa desde la primera etapa sin
+    terminar; una ejecución nueva corre todas las etapas otra vez.
+    """
+
+    def __init__(self, logger, ticker, ruta, frames=None, ejecucion=None):
+        self.logger = logger
+        self.ticker = ticker
+        self.ejecucion = ejecucion or date.today().isoformat()
+        self.ruta = os.path.join(ruta, ticker)
+        self.ruta_estado = os.path.join(self.ruta, "estado.json")
+        # Artefactos ya en memoria (p. ej. el frame que llega del fetcher):
+        # se usan antes de releer el CSV del checkpoint
+        self.frames = dict(frames or {})
+        os.makedirs(self.ruta, exist_ok=True)
+
+    def leer_estado(self):
+        if os.path.exists(self.ruta_estado):
+            with open(self.ruta_estado, encoding="utf-8") as f:
+                estado = json.load(f)
+            if estado.get('ejecucion') == self.ejecucion:
+                return estado
+        return {'ticker': self.ticker, 'ejecucion': self.ejecucion, 'etapas': {}}
+
+    def guardar_estado(self, estado):
+        with open(self.ruta_estado + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(estado, f, ensure_ascii=False, indent=2)
+        os.replace(self.ruta_estado + ".tmp", self.ruta_estado)
+
+    def reiniciar(self):
+        if os.path.exists(self.ruta_estado):
+            os.remove(self.ruta_estado)
+
+    def artefacto(self, nombre):
+        return os.path.join(self.ruta, f"{nombre}.csv")
+
+    def guardar_artefacto(self, nombre, df):
+        ruta = self.artefacto(nombre)
+        df.to_csv(ruta + ".tmp", index=False)
+        os.replace(ruta + ".tmp", ruta)
+        self.frames[nombre] = df
+
+    def leer_artefacto(self, nombre):
+        if nombre in self.frames:
+            return self.frames[nombre].copy()
+        df = pd.read_csv(self.artefacto(nombre))
+        df['fecha'] = pd.to_datetime(df['fecha'])
+        self.frames[nombre] = df
+        return df.copy()
+
+    # ===== Etapas =====
+    def recolectar(self):
+        df = Collector(self.logger, self.ticker).descargar()
+        df = df.loc[:, ~df.columns.duplicated()].dropna(subset=['fecha'])
+        if df.empty:
+            raise ValueError("Sin datos recolectados")
+        self.guardar_artefacto('crudo', df)
+
+    def validar(self):
+        df_valido, df_cuarentena = Validator(self.logger).validar(self.leer_artefacto('crudo'))
+        if df_valido.empty:
+            raise ValueError("Ninguna fila pasó la validación")
+        self.guardar_artefacto('valido', df_valido.sort_values('fecha'))
+        self.guardar_artefacto('cuarentena', df_cuarentena)
+
+    def enriquecer(self):
+        df_enriquecido = Enricher(self.logger).calcular_kpi(self.leer_artefacto('valido'))
+        if df_enriquecido.empty:
+            raise ValueError("El enriquecimiento no devolvió datos")
+        self.guardar_artefacto('enriquecido', df_enriquecido)
+
+    def entrenar(self):
+        df = self.leer_artefacto('valido').sort_values('fecha').reset_index(drop=True)
+        if not Modeller(self.logger, self.ticker).entrenar(df):
+            raise ValueError("Error al entrenar el modelo")
+
+    def pronosticar(self):
+        modeller = Modeller(self.logger, self.ticker)
+        forecast = modeller.predecir(None, steps=modeller.HORIZONTE_MAXIMO)
+        if not forecast:
+            raise ValueError("No se pudo generar el pronóstico")
+        modeller.precalcular_pronostico()
+
+        df_valido = self.leer_artefacto('valido')
+        ultima_fecha = df_valido['fecha'].max()
+        fechas = pd.bdate_range(ultima_fecha + pd.Timedelta(days=1), periods=len(forecast))
+        self.guardar_artefacto('pronostico', pd.DataFrame({'fecha': fechas, 'pronostico': forecast}))
+
+        ledger = ForecastLedger(self.logger, self.ticker)
+        ledger.actualizar(df_valido)
+        ledger.registrar(ultima_fecha, fechas, forecast, modeller.version_modelo())
+
+    def ejecutar(self, etapas=ETAPAS):
+        """Corre las etapas pendientes; devuelve el resumen del ticker"""
+        estado = self.leer_estado()
+        resumen = {'ticker': self.ticker, 'estado': 'ok', 'ultima_etapa': None, 'segundos': 0.0, 'error': ''}
+
+        for etapa in etapas:
+            if estado['etapas'].get(etapa, {}).get('estado') == 'ok':
+                resumen['ultima_etapa'] = etapa
+                continue
+
+            inicio = time.perf_counter()
+            try:
+                getattr(self, etapa)()
+                estado['etapas'][etapa] = {'estado': 'ok', 'segundos': round(time.perf_counter() - inicio, 3)}
+                resumen['ultima_etapa'] = etapa
+            except Exception as e:
+                estado['etapas'][etapa] = {'estado': 'error', 'segundos': round(time.perf_counter() - inicio, 3), 'error': str(e)}
+                resumen.update(estado='error', error=f"{etapa}: {e}")
+                self.logger.error("TickerPipeline", "ejecutar", f"{self.ticker} falló en {etapa}: {e}")
+                break
+            finally:
+                self.guardar_estado(estado)
+
+        resumen['segundos'] = sum(e.get('segundos', 0) for e in estado['etapas'].values())
+        for etapa in ETAPAS:
+            resumen[etapa] = estado['etapas'].get(etapa, {}).get('segundos')
+        return resumen
+
+def procesar_ticker(ticker, ruta, reiniciar=False, etapas=ETAPAS, frames=None, ejecucion=None):
+    """Punto de entrada de cada proceso del pool"""
+    pipeline = TickerPipeline(obtener_logger(), ticker, ruta, frames, ejecucion)
+    if reiniciar:
+        pipeline.reiniciar()
+    return pipeline.ejecutar(etapas)
+
+class Pipeline:
+    """Reparte el universo de tickers en un pool de procesos"""
+
+    def __init__(self, logger, workers=None, ruta=None, ejecucion=None):
+        self.logger = logger
+        self.workers = workers or os.cpu_count()
+        # Fijada al crear el pipeline: una corrida que cruza la medianoche sigue siendo una sola
+        self.ejecucion = ejecucion or date.today().isoformat()
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        self.ruta = ruta or os.path.join(base_dir, "static", "data", "pipeline")
+
+    def ejecutar(self, tickers, reiniciar=False, reintentos=2):
+        """
+        Si un proceso muere, el pool se rompe y falla todos sus trabajos
+        pendientes: se crea un pool nuevo y se reenvían los tickers sin
+        terminar, que retoman desde su checkpoint. Tras `reintentos` pools
+        rotos, los restantes corren cada uno en su propio proceso, así solo
+        falla el ticker que provoca la caída.
+        """
+        inicio = time.perf_counter()
+        resultados = []
+        rotos = self._ronda(tickers, reiniciar, resultados)
+        self._recuperar(rotos, resultados, reintentos - 1)
+        return self.resumir(resultados, time.perf_counter() - inicio)
+
+    def _recuperar(self, rotos, resultados, rondas):
+        """
+        Tickers que cayeron con un pool roto: hasta `rondas` pools nuevos y
+        después un proceso por ticker. Continúan desde sus checkpoints.
+        """
+        for _ in range(rondas):
+            if not rotos:
+                return
+            self.logger.warning("Pipeline", "ejecutar", f"Pool de procesos roto; se reenvían {len(rotos)} ticker(s)")
+            rotos = self._ronda(rotos, False, resultados)
+
+        if rotos:
+            self.logger.warning("Pipeline", "ejecutar", f"Pool de procesos roto; {len(rotos)} ticker(s) corren aislados")
+            self._ronda_aislada(rotos, resultados)
+
+    def _ronda(self, tickers, reiniciar, resultados):
+        """Corre los tickers en un pool compartido; devuelve los que cayeron con el pool"""
+        rotos = []
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            futuros = {executor.submit(procesar_ticker, ticker, self.ruta, reiniciar, ETAPAS, None, self.ejecucion): ticker
+                       for ticker in tickers}
+            for futuro in as_completed(futuros):
+                ticker = futuros[futuro]
+                try:
+                    resultados.append(futuro.result())
+                except BrokenProcessPool:
+                    rotos.append(ticker)
+                except Exception as e:
+                    resultados.append({'ticker': ticker, 'estado': 'error', 'error': f"proceso: {e}"})
+        return rotos
+
+    def _procesar_aislado(self, ticker):
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            return executor.submit(procesar_ticker, ticker, self.ruta, False, ETAPAS, None, self.ejecucion).result()
+
+    def _ronda_aislada(self, tickers, resultados):
+        """Un proceso por ticker (hasta `workers` a la vez): una caída solo afecta a su ticker"""
+        with ThreadPoolExecutor(max_workers=self.workers) as hilos:
+            futuros = {hilos.submit(self._procesar_aislado, ticker): ticker for ticker in tickers}
+            for futuro in as_completed(futuros):
+                try:
+                    resultados.append(futuro.result())
+                except Exception as e:
+                    resultados.append({'ticker': futuros[futuro], 'estado': 'error', 'error': f"proceso: {e}"})
+
+    def ejecutar_solapado(self, tickers, fetchers=8, reiniciar=False, reintentos=2):
+        """
+        Solapa red y CPU: hilos fetchers recolectan y dejan el frame parseado en
+        una cola acotada; el hilo principal lo envía al pool de procesos para
+        validar, enriquecer, entrenar y pronosticar. La cola llena frena a los
+        fetchers y un semáforo limita los trabajos en vuelo, así la memoria
+        queda acotada mientras el tiempo total tiende a max(red, cómputo).
+
+        Si un proceso muere, el pool queda roto: el evento `detener` libera a
+        los fetchers bloqueados en la cola llena y los tickers en vuelo o aún
+        no enviados se recuperan como en `ejecutar`, desde sus checkpoints.
+        """
+        inicio = time.perf_counter()
+        pendientes = queue.Queue()
+        for ticker in tickers:
+            pendientes.put(ticker)
+        cola = queue.Queue(maxsize=2 * self.workers)
+        en_vuelo = threading.BoundedSemaphore(2 * self.workers)
+        detener = threading.Event()
+        iniciados = set()
+
+        def fetcher():
+            while not detener.is_set():
+                try:
+                    ticker = pendientes.get_nowait()
+                except queue.Empty:
+                    return
+                iniciados.add(ticker)
+                try:
+                    pipeline = TickerPipeline(self.logger, ticker, self.ruta, ejecucion=self.ejecucion)
+                    if reiniciar:
+                        pipeline.reiniciar()
+                    resumen = pipeline.ejecutar(['recolectar'])
+                    frames = {'crudo': pipeline.frames['crudo']} if 'crudo' in pipeline.frames else None
+                except Exception as e:
+                    resumen, frames = {'ticker': ticker, 'estado': 'error', 'error': f"recolectar: {e}"}, None
+                while not detener.is_set():
+                    try:
+                        cola.put((ticker, resumen, frames), timeout=0.5)
+                        break
+                    except queue.Full:
+                        continue
+
+        resultados = []
+        futuros = {}
+        recibidos = set()
+        rotos = []
+        with ProcessPoolExecutor(max_workers=self.workers) as executor, \
+                ThreadPoolExecutor(max_workers=fetchers) as red:
+            try:
+                for _ in range(fetchers):
+                    red.submit(fetcher)
+
+                for _ in range(len(tickers)):
+                    ticker, resumen, frames = cola.get()
+                    recibidos.add(ticker)
+                    if resumen['estado'] != 'ok':
+                        resultados.append(resumen)
+                        continue
+
+                    en_vuelo.acquire()
+                    try:
+                        futuro = executor.submit(procesar_ticker, ticker, self.ruta, False, ETAPAS[1:], frames, self.ejecucion)
+                    except BrokenProcessPool:
+                        en_vuelo.release()
+                        rotos.append(ticker)
+                        break
+                    futuro.add_done_callback(lambda _: en_vuelo.release())
+                    futuros[futuro] = ticker
+
+                for futuro in as_completed(futuros):
+                    try:
+                        resultados.append(futuro.result())
+                    except BrokenProcessPool:
+                        rotos.append(futuros[futuro])
+                    except Exception as e:
+                        resultados.append({'ticker': futuros[futuro], 'estado': 'error', 'error': f"proceso: {e}"})
+            finally:
+                # Antes de cerrar los pools: ningún fetcher puede quedar esperando en la cola
+                detener.set()
+                while True:
+                    try:
+                        cola.get_nowait()
+                    except queue.Empty:
+                        break
+
+        if rotos:
+            rotos += [t for t in tickers if t not in recibidos and t not in rotos]
+            if reiniciar:
+                # Los que ningún fetcher llegó a tomar todavía conservan checkpoints viejos
+                for ticker in rotos:
+                    if ticker not in iniciados:
+                        TickerPipeline(self.logger, ticker, self.ruta, ejecucion=self.ejecucion).reiniciar()
+            self._recuperar(rotos, resultados, reintentos - 1)
+
+        return self.resumir(resultados, time.perf_counter() - inicio)
+
+    def resumir(self, resultados, segundos):
+        resumen = pd.DataFrame(resultados).sort_values('ticker').reset_index(drop=True)
+        ok = int((resumen['estado'] == 'ok').sum())
+        red = resumen['recolectar'].sum() if 'recolectar' in resumen else 0
+        computo = resumen.reindex(columns=ETAPAS[1:]).sum().sum()
+        self.logger.info("Pipeline", "ejecutar",
+                         f"{ok}/{len(resumen)} tickers completos en {segundos:.1f}s con {self.workers} worker(s) "
+                         f"(red acumulada {red:.1f}s, cómputo acumulado {computo:.1f}s)")
+        resumen.to_csv(os.path.join(self.ruta, "resumen.csv"), index=False)
+        return resumen
+
+def leer_tickers(args):
+    tickers = list(args.tickers or [])
+    if args.archivo_tickers:
+        with open(args.archivo_tickers, encoding="utf-8") as f:
+            tickers += [linea.strip().upper() for linea in f if linea.strip()]
+    return list(dict.fromkeys(tickers)) or [Modeller.TICKER_POR_DEFECTO]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pipeline multi-ticker con checkpoints por etapa")
+    parser.add_argument("--tickers", nargs="+", help="Tickers a procesar")
+    parser.add_argument("--archivo-tickers", help="Archivo con un ticker por línea")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Procesos en paralelo")
+    parser.add_argument("--reiniciar", action="store_true", help="Ignora los checkpoints y corre todo de nuevo")
+    parser.add_argument("--ejecucion", help="Id de la corrida a retomar (por defecto la fecha de hoy, AAAA-MM-DD)")
+    parser.add_argument("--solapar", action="store_true", help="Recolecta en hilos mientras el pool calcula")
+    parser.add_argument("--fetchers", type=int, default=8, help="Hilos de descarga con --solapar")
+    args = parser.parse_args()
+
+    logger = Logger()
+    pipeline = Pipeline(logger, workers=args.workers, ejecucion=args.ejecucion)
+    if args.solapar:
+        resumen = pipeline.ejecutar_solapado(leer_tickers(args), fetchers=args.fetchers, reiniciar=args.reiniciar)
+    else:
+        resumen = pipeline.ejecutar(leer_tickers(args), reiniciar=args.reiniciar)
+
+    pd.set_option('display.width', 200)
+    print(resumen.to_string(index=False))
@@ -0,0 +1,195 @@
+import os
+import re
+import json
+import time
+import queue
+import argparse
+import threading
+import numpy as np
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from logger import Logger
+from modeller import Modeller
+
+class Batcher:
+    """
+    Mantiene un modelo residente y agrupa las solicitudes concurrentes que
+    llegan dentro de `ventana` segundos en una sola llamada a forecast con el
+    horizonte mayor; cada solicitud recibe su recorte. Antes de cada lote
+    compara la firma (mtime, tamaño) de model.pkl y recarga el modelo si fue
+    reentrenado.
+    """
+
+    def __init__(self, modeller, ventana=0.005):
+        self.modeller = modeller
+        self.ventana = ventana
+        self.firma = None
+        self.recargar()
+        self.cola = queue.Queue()
+        self.lotes = 0
+        self.solicitudes = 0
+        threading.Thread(target=self._procesar, daemon=True).start()
+
+    def firma_modelo(self):
+        stat = os.stat(self.modeller.model_file)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def recargar(self):
+        """Carga el modelo si model.pkl cambió desde la última carga"""
+        firma = self.firma_modelo()
+        if firma == self.firma:
+            return
+        modelo, version = self.modeller.cargar_modelo()
+        self.modelo, self.version, self.firma = modelo, version, firma
+        self.modeller.logger.info("Batcher", "recargar", f"Modelo {version} cargado")
+
+    def pronosticar(self, steps):
+        """(pronóstico de `steps` pasos, versión del modelo que lo generó)"""
+        futuro = Future()
+        self.cola.put((steps, futuro))
+        return futuro.result()
+
+    def _procesar(self):
+        while True:
+            lote = [self.cola.get()]
+            limite = time.perf_counter() + self.ventana
+            while True:
+                restante = limite - time.perf_counter()
+                if restante <= 0:
+                    break
+                try:
+                    lote.append(self.cola.get(timeout=restante))
+                except queue.Empty:
+                    break
+
+            try:
+                try:
+                    self.recargar()
+                except Exception as e:
+                    # Un archivo a medio escribir o borrado: se sigue con el modelo residente
+                    self.modeller.logger.warning("Batcher", "recargar", f"Se mantiene el modelo {self.version}: {e}")
+                forecast = np.asarray(self.modelo.forecast(steps=max(steps for steps, _ in lote)))
+                for steps, futuro in lote:
+                    futuro.set_result((forecast[:steps].tolist(), self.version))
+            except Exception as e:
+                for _, futuro in lote:
+                    futuro.set_exception(e)
+
+            self.lotes += 1
+            self.solicitudes += len(lote)
+
+# El ticker arma la ruta del pickle que se carga: solo símbolos bursátiles
+PATRON_TICKER = re.compile(r'[A-Z0-9.\-^]{1,12}')
+
+class ColaHTTPServer(ThreadingHTTPServer):
+    # Cola de conexiones amplia para ráfagas de clientes concurrentes
+    request_queue_size = 256
+
+class ForecastServer:
+    def __init__(self, logger, host="127.0.0.1", puerto=8000, ventana=0.005, horizonte_maximo=365):
+        self.logger = logger
+        self.ventana = ventana
+        self.horizonte_maximo = horizonte_maximo
+        self.batchers = {}
+        self.lock = threading.Lock()
+        self.latencias = deque(maxlen=10000)
+        self.httpd = ColaHTTPServer((host, puerto), self._handler())
+
+    def batcher(self, ticker):
+        """Batcher del ticker; el modelo se carga una sola vez y queda residente"""
+        with self.lock:
+            if ticker not in self.batchers:
+                modeller = Modeller(self.logger, ticker)
+                if not os.path.exists(modeller.model_file):
+                    raise FileNotFoundError(f"No hay modelo entrenado para {ticker}")
+                self.batchers[ticker] = Batcher(modeller, self.ventana)
+                self.logger.info("ForecastServer", "batcher", f"Modelo de {ticker} cargado en memoria")
+            return self.batchers[ticker]
+
+    def metricas(self):
+        latencias = np.array(self.latencias) * 1000
+        p50, p95, p99 = np.percentile(latencias, [50, 95, 99]) if len(latencias) else (0, 0, 0)
+        solicitudes = sum(b.solicitudes for b in self.batchers.values())
+        lotes = sum(b.lotes for b in self.batchers.values())
+        return {
+            'solicitudes': solicitudes,
+            'lotes': lotes,
+            'solicitudes_por_lote': solicitudes / lotes if lotes else 0,
+            'latencia_p50_ms': p50,
+            'latencia_p95_ms': p95,
+            'latencia_p99_ms': p99,
+        }
+
+    def _handler(self):
+        servidor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _responder(self, codigo, cuerpo):
+                datos = json.dumps(cuerpo).encode("utf-8")
+                self.send_response(codigo)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(datos)))
+                self.end_headers()
+                self.wfile.write(datos)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path == "/metricas":
+                    return self._responder(200, servidor.metricas())
+                if url.path != "/pronostico":
+                    return self._responder(404, {'error': 'Ruta no encontrada'})
+
+                inicio = time.perf_counter()
+                params = parse_qs(url.query)
+                ticker = params.get('ticker', [Modeller.TICKER_POR_DEFECTO])[0].upper()
+                if not PATRON_TICKER.fullmatch(ticker):
+                    return self._responder(400, {'error': 'ticker inválido'})
+                try:
+                    horizonte = int(params.get('horizonte', ['1'])[0])
+                except ValueError:
+                    return self._responder(400, {'error': 'horizonte debe ser entero'})
+                if not 1 <= horizonte <= servidor.horizonte_maximo:
+                    return self._responder(400, {'error': f'horizonte debe estar entre 1 y {servidor.horizonte_maximo}'})
+
+                try:
+                    batcher = servidor.batcher(ticker)
+                    pronostico, version = batcher.pronosticar(horizonte)
+                except FileNotFoundError as e:
+                    return self._responder(404, {'error': str(e)})
+                except Exception as e:
+                    servidor.logger.error("ForecastServer", "do_GET", f"Error en pronóstico de {ticker}: {e}")
+                    return self._responder(500, {'error': str(e)})
+
+                servidor.latencias.append(time.perf_counter() - inicio)
+                self._responder(200, {'ticker': ticker, 'horizonte': horizonte,
+                                      'version': version, 'pronostico': pronostico})
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def iniciar(self):
+        host, puerto = self.httpd.server_address[:2]
+        self.logger.info("ForecastServer", "iniciar", f"Sirviendo pronósticos en http://{host}:{puerto}")
+        self.httpd.serve_forever()
+
+    def detener(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servicio HTTP de pronósticos")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8000)
+    parser.add_argument("--ventana-ms", type=float, default=5, help="Espera para agrupar solicitudes")
+    args = parser.parse_args()
+
+    servidor = ForecastServer(Logger(), args.host, args.puerto, ventana=args.ventana_ms / 1000)
+    print(f"Sirviendo en http://{args.host}:{args.puerto}/pronostico?ticker=META&horizonte=7")
+    try:
+        servidor.iniciar()
+    except KeyboardInterrupt:
+        servidor.detener()
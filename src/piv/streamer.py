@@ -0,0 +1,218 @@
+import os
+import json
+import time
+import socket
+import argparse
+import numpy as np
+import pandas as pd
+from logger import Logger
+
+class RingBuffer:
+    """
+    Buffer circular de barras de un ticker sobre arreglos NumPy preasignados:
+    la memoria queda fija en `capacidad` filas sin importar cuánto dure el stream.
+    """
+
+    COLUMNAS = ['apertura', 'alto', 'bajo', 'cerrar', 'volumen',
+                'retorno_diario', 'tasa_variacion_ac', 'retorno_acumulado',
+                'media_movil_5d', 'volatilidad']
+
+    def __init__(self, capacidad):
+        self.capacidad = capacidad
+        self.fechas = np.zeros(capacidad, dtype='int64')
+        self.datos = np.zeros((capacidad, len(self.COLUMNAS)), dtype='float64')
+        self.total = 0
+
+    def __len__(self):
+        return min(self.total, self.capacidad)
+
+    def agregar(self, fecha, fila):
+        i = self.total % self.capacidad
+        self.fechas[i] = fecha
+        self.datos[i] = fila
+        self.total += 1
+
+    def reemplazar_ultimo(self, fila):
+        self.datos[(self.total - 1) % self.capacidad] = fila
+
+    def ultimo(self):
+        i = (self.total - 1) % self.capacidad
+        return self.fechas[i], self.datos[i]
+
+    def cierres(self, n):
+        """Últimos n cierres en orden cronológico"""
+        n = min(n, len(self))
+        posiciones = np.arange(self.total - n, self.total) % self.capacidad
+        return self.datos[posiciones, self.COLUMNAS.index('cerrar')]
+
+    def a_dataframe(self, desde, hasta):
+        """Filas con número de secuencia en [desde, hasta) como DataFrame"""
+        desde = max(desde, self.total - self.capacidad)
+        posiciones = np.arange(desde, hasta) % self.capacidad
+        df = pd.DataFrame(self.datos[posiciones], columns=self.COLUMNAS)
+        df.insert(0, 'fecha', pd.to_datetime(self.fechas[posiciones]))
+        return df
+
+class Streamer:
+    """
+    Ingesta continua de barras de 1 minuto (o ticks que se agregan a barras).
+    Mantiene un RingBuffer por ticker, actualiza los KPIs del Enricher barra a
+    barra y guarda las barras completas en lotes.
+    """
+
+    def __init__(self, logger, capacidad=390 * 5, tamano_lote=390, ventana=5, ruta=None):
+        self.logger = logger
+        self.capacidad = capacidad
+        self.tamano_lote = min(tamano_lote, capacidad - 1)
+        self.ventana = ventana
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        self.ruta = ruta or os.path.join(base_dir, "static", "data", "intraday")
+        os.makedirs(self.ruta, exist_ok=True)
+
+        self.buffers = {}
+        self.estado = {}
+        self.latencias = np.zeros(10000)
+        self.n_latencias = 0
+
+    def _kpis(self, buffer, estado, apertura, cerrar):
+        """KPIs de la barra actual con la misma definición que Enricher.calcular_kpi"""
+        cierre_previo = estado['cierre_previo']
+        retorno = cerrar / cierre_previo - 1 if cierre_previo else 0.0
+        acumulado = (1 + estado['acumulado_previo']) * (1 + retorno) - 1
+        tasa = (cerrar - apertura) / apertura if apertura else np.nan
+
+        cierres = buffer.cierres(self.ventana)
+        if len(cierres) == self.ventana:
+            media = cierres.mean()
+            volatilidad = cierres.std(ddof=1)
+        else:
+            media, volatilidad = 0.0, 0.0
+
+        return retorno, tasa, acumulado, media, volatilidad
+
+    def procesar_barra(self, ticker, fecha, apertura, alto, bajo, cerrar, volumen):
+        """
+        Agrega una barra al buffer del ticker. Una barra con la misma fecha que
+        la última es una actualización de la barra en curso; una fecha nueva
+        cierra la anterior.
+        """
+        fecha = pd.Timestamp(fecha).value
+        buffer = self.buffers.get(ticker)
+        if buffer is None:
+            buffer = self.buffers[ticker] = RingBuffer(self.capacidad)
+            self.estado[ticker] = {'cierre_previo': None, 'acumulado_previo': 0.0, 'guardadas': 0}
+        estado = self.estado[ticker]
+
+        fila = np.array([apertura, alto, bajo, cerrar, volumen, 0, 0, 0, 0, 0], dtype='float64')
+        actualizacion = buffer.total > 0 and buffer.ultimo()[0] == fecha
+
+        if actualizacion:
+            buffer.reemplazar_ultimo(fila)
+        else:
+            if buffer.total > 0:
+                _, previa = buffer.ultimo()
+                estado['cierre_previo'] = previa[3]
+                estado['acumulado_previo'] = previa[7]
+            buffer.agregar(fecha, fila)
+
+        fila[5:] = self._kpis(buffer, estado, apertura, cerrar)
+        buffer.reemplazar_ultimo(fila)
+
+        # La barra en curso no se guarda hasta que llega la siguiente
+        if buffer.total - 1 - estado['guardadas'] >= self.tamano_lote:
+            self.guardar(ticker)
+
+    def procesar_tick(self, ticker, fecha, precio, volumen=0):
+        """Agrega un tick a la barra de 1 minuto correspondiente"""
+        minuto = pd.Timestamp(fecha).floor('min')
+        buffer = self.buffers.get(ticker)
+        if buffer is not None and buffer.total > 0 and buffer.ultimo()[0] == minuto.value:
+            _, barra = buffer.ultimo()
+            self.procesar_barra(ticker, minuto, barra[0], max(barra[1], precio),
+                                min(barra[2], precio), precio, barra[4] + volumen)
+        else:
+            self.procesar_barra(ticker, minuto, precio, precio, precio, precio, volumen)
+
+    def guardar(self, ticker, incluir_en_curso=False):
+        """Agrega al CSV del ticker las barras completas pendientes"""
+        buffer = self.buffers[ticker]
+        estado = self.estado[ticker]
+        hasta = buffer.total if incluir_en_curso else buffer.total - 1
+        if hasta <= estado['guardadas']:
+            return
+
+        try:
+            df = buffer.a_dataframe(estado['guardadas'], hasta)
+            ruta = os.path.join(self.ruta, f"{ticker}_1m.csv")
+            df.to_csv(ruta, mode='a', header=not os.path.exists(ruta), index=False, float_format='%.4f')
+            estado['guardadas'] = hasta
+        except Exception as e:
+            self.logger.error("Streamer", "guardar", f"Error al guardar barras de {ticker}: {e}")
+
+    def ejecutar(self, fuente):
+        """Consume una fuente de barras o ticks (dicts) hasta que se agote"""
+        for evento in fuente:
+            inicio = time.perf_counter()
+            if 'precio' in evento:
+                self.procesar_tick(evento['ticker'], evento['fecha'], float(evento['precio']),
+                                   float(evento.get('volumen', 0)))
+            else:
+                self.procesar_barra(evento['ticker'], evento['fecha'], float(evento['apertura']),
+                                    float(evento['alto']), float(evento['bajo']),
+                                    float(evento['cerrar']), float(evento['volumen']))
+            self.latencias[self.n_latencias % len(self.latencias)] = time.perf_counter() - inicio
+            self.n_latencias += 1
+
+        for ticker in self.buffers:
+            self.guardar(ticker, incluir_en_curso=True)
+
+        self.logger.info("Streamer", "ejecutar", f"Stream finalizado: {self.n_latencias} eventos, {self.resumen_latencia()}")
+
+    def resumen_latencia(self):
+        muestras = self.latencias[:min(self.n_latencias, len(self.latencias))] * 1e6
+        if not len(muestras):
+            return "sin eventos"
+        p50, p99 = np.percentile(muestras, [50, 99])
+        return f"latencia por evento p50={p50:.1f}µs p99={p99:.1f}µs"
+
+    def kpis(self, ticker, n=None):
+        """Vista actual del buffer de un ticker con sus KPIs"""
+        buffer = self.buffers[ticker]
+        n = n or len(buffer)
+        return buffer.a_dataframe(buffer.total - n, buffer.total)
+
+def reproducir_csv(ruta, pausa=0.0):
+    """Fuente local: reproduce un CSV de barras o ticks ordenado por fecha"""
+    df = pd.read_csv(ruta)
+    for evento in df.to_dict('records'):
+        yield evento
+        if pausa:
+            time.sleep(pausa)
+
+def leer_socket(host, puerto):
+    """Fuente en red: una barra o tick en JSON por línea"""
+    with socket.create_connection((host, puerto)) as conexion:
+        with conexion.makefile('r', encoding='utf-8') as lector:
+            for linea in lector:
+                if linea.strip():
+                    yield json.loads(linea)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingesta intradía de barras de 1 minuto")
+    parser.add_argument("--replay", help="CSV de barras o ticks a reproducir")
+    parser.add_argument("--socket", help="host:puerto que emite barras o ticks en JSON por línea")
+    parser.add_argument("--capacidad", type=int, default=390 * 5, help="Barras por ticker en memoria")
+    parser.add_argument("--lote", type=int, default=390, help="Barras por escritura a disco")
+    args = parser.parse_args()
+
+    if args.replay:
+        fuente = reproducir_csv(args.replay)
+    elif args.socket:
+        host, puerto = args.socket.rsplit(":", 1)
+        fuente = leer_socket(host, int(puerto))
+    else:
+        parser.error("Indica --replay o --socket")
+
+    streamer = Streamer(Logger(), capacidad=args.capacidad, tamano_lote=args.lote)
+    streamer.ejecutar(fuente)
+    print(streamer.resumen_latencia())
@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+
+class Validator:
+    """
+    Reglas de calidad sobre el histórico antes del enriquecimiento. Cada regla
+    es una comparación vectorizada sobre columnas completas; el resultado se
+    codifica como bits en un entero por fila, así el costo no depende de
+    cuántas reglas falle cada fila.
+    """
+
+    # Código -> descripción. El orden define el bit de cada regla.
+    REGLAS = {
+        'precio_nulo': 'Fila sin precios (dividendo, split u otra fila que no es barra)',
+        'alto_menor_bajo': 'alto < bajo',
+        'apertura_fuera_rango': 'apertura fuera de [bajo, alto]',
+        'cierre_fuera_rango': 'cerrar fuera de [bajo, alto]',
+        'precio_no_positivo': 'algún precio <= 0',
+        'volumen_no_positivo': 'volumen nulo, cero o negativo',
+        'fecha_duplicada': 'fecha repetida (por ticker si hay columna ticker)',
+        'dia_no_habil': 'fecha en fin de semana',
+    }
+
+    def __init__(self, logger, tolerancia=1e-6, dias_hueco=4):
+        self.logger = logger
+        self.tolerancia = tolerancia
+        self.dias_hueco = dias_hueco
+
+    def _mascaras(self, df):
+        """Una máscara booleana por regla, en el mismo orden que REGLAS"""
+        n = len(df)
+
+        def columna(nombre):
+            if nombre in df.columns:
+                return pd.to_numeric(df[nombre], errors='coerce').to_numpy(dtype=float)
+            return np.full(n, np.nan)
+
+        apertura, alto, bajo, cerrar = (columna(c) for c in ['apertura', 'alto', 'bajo', 'cerrar'])
+        volumen = columna('volumen')
+        fechas = pd.to_datetime(df['fecha'], errors='coerce')
+        tol = self.tolerancia
+
+        # En frames de varios tickers la misma fecha se repite una vez por ticker
+        if 'ticker' in df.columns:
+            duplicadas = pd.DataFrame({'ticker': df['ticker'].to_numpy(), 'fecha': fechas.to_numpy()}).duplicated(keep='first')
+        else:
+            duplicadas = fechas.duplicated(keep='first')
+
+        precios = np.column_stack([apertura, alto, bajo, cerrar])
+        with np.errstate(invalid='ignore'):
+            return [
+                np.isnan(precios).any(axis=1),
+                alto < bajo - tol,
+                (apertura < bajo - tol) | (apertura > alto + tol),
+                (cerrar < bajo - tol) | (cerrar > alto + tol),
+                (precios <= 0).any(axis=1),
+                ~(volumen > 0),
+                duplicadas.to_numpy(),
+                (fechas.dt.dayofweek >= 5).to_numpy(),
+            ]
+
+    def validar(self, df):
+        """
+        Devuelve (df_valido, df_cuarentena). La cuarentena conserva las filas
+        originales con la columna `motivo` (códigos separados por '|').
+        """
+        try:
+            if df.empty:
+                return df, df.assign(motivo=pd.Series(dtype=str))
+
+            bits = np.zeros(len(df), dtype=np.uint32)
+            for i, mascara in enumerate(self._mascaras(df)):
+                bits |= mascara.astype(np.uint32) << i
+
+            invalidas = bits != 0
+            df_valido = df[~invalidas]
+            df_cuarentena = df[invalidas].copy()
+
+            # Solo se arma el texto de los pocos patrones de fallo distintos
+            codigos = list(self.REGLAS)
+            patrones, inversa = np.unique(bits[invalidas], return_inverse=True)
+            textos = np.array(['|'.join(c for i, c in enumerate(codigos) if p >> i & 1) for p in patrones], dtype=object)
+            df_cuarentena['motivo'] = textos[inversa] if len(patrones) else []
+
+            self._reportar(df_valido, df_cuarentena, bits)
+            return df_valido, df_cuarentena
+
+        except Exception as e:
+            self.logger.error("Validator", "validar", f"Error al validar datos: {e}")
+            return df, df.iloc[0:0].assign(motivo=pd.Series(dtype=str))
+
+    def _reportar(self, df_valido, df_cuarentena, bits):
+        conteos = {codigo: int((bits >> i & 1).sum()) for i, codigo in enumerate(self.REGLAS)}
+        conteos = {codigo: n for codigo, n in conteos.items() if n}
+        self.logger.info("Validator", "validar",
+                         f"Filas válidas: {len(df_valido)}, en cuarentena: {len(df_cuarentena)} {conteos}")
+
+        # Huecos de más de `dias_hueco` días hábiles: no invalidan filas, se avisan
+        if 'ticker' in df_valido.columns:
+            orden = df_valido[['ticker', 'fecha']].assign(fecha=pd.to_datetime(df_valido['fecha'])).sort_values(['ticker', 'fecha'])
+            mismo_ticker = (orden['ticker'].to_numpy()[1:] == orden['ticker'].to_numpy()[:-1])
+            fechas = orden['fecha'].to_numpy(dtype='datetime64[D]')
+        else:
+            fechas = np.sort(pd.to_datetime(df_valido['fecha']).to_numpy(dtype='datetime64[D]'))
+            mismo_ticker = np.ones(max(len(fechas) - 1, 0), dtype=bool)
+        if len(fechas) > 1:
+            saltos = np.busday_count(fechas[:-1], fechas[1:])
+            huecos = int(((saltos > self.dias_hueco) & mismo_ticker).sum())
+            if huecos:
+                self.logger.warning("Validator", "validar", f"{huecos} hueco(s) de más de {self.dias_hueco} días hábiles en el histórico")